@@ -0,0 +1,88 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+
+import metrics
+import workers
+
+# Admission limits for uploads
+MAX_CONCURRENT_EXTRACTIONS = int(os.getenv("MAX_CONCURRENT_EXTRACTIONS", workers.EXTRACT_WORKERS))
+MAX_QUEUED_FILES = int(os.getenv("MAX_QUEUED_FILES", 100))
+MAX_FILES_PER_REQUEST = int(os.getenv("MAX_FILES_PER_REQUEST", 50))
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", 100 * 1024 * 1024))
+
+
+class QueueFull(Exception):
+    """Raised by AdmissionController.admit; `retry_after` is in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Extraction queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds the PDFs waiting for extraction and the extractions running at
+    once. A request's files are admitted up front with admit(), which
+    refuses them all if the queue would overflow; each file then waits in
+    slot() for one of `concurrency` extraction slots.
+    """
+
+    def __init__(self, concurrency, max_queued):
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max_queued
+        self.queued = 0
+        self.running = 0
+        self.semaphore = None
+        # Moving average of the time a file holds a slot, for Retry-After
+        self.avg_seconds = None
+
+    def start(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    def admit(self, count):
+        """Reserves queue places for `count` files, or raises QueueFull."""
+        if self.queued + count > self.max_queued:
+            metrics.registry.inc("upload_rejections_total", reason="queue_full")
+            raise QueueFull(self.retry_after(count))
+        self.queued += count
+        self._update_gauges()
+
+    def cancel(self, count):
+        """Gives back places reserved for files that will never take a slot."""
+        self.queued -= count
+        self._update_gauges()
+
+    def retry_after(self, count=1):
+        """Estimated seconds until `count` more files would be admitted."""
+        # Places free up as queued files start, `concurrency` at a time
+        backlog = self.queued + count - self.max_queued
+        seconds = max(backlog, 1) * (self.avg_seconds or 1) / self.concurrency
+        return max(1, math.ceil(seconds))
+
+    @asynccontextmanager
+    async def slot(self):
+        """Waits for an extraction slot for one admitted file and holds it."""
+        waited = time.perf_counter()
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.queued -= 1
+        started = time.perf_counter()
+        metrics.registry.observe("extraction_queue_wait_seconds", started - waited)
+        self.running += 1
+        self._update_gauges()
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self.semaphore.release()
+            self._update_gauges()
+            duration = time.perf_counter() - started
+            self.avg_seconds = duration if self.avg_seconds is None else 0.8 * self.avg_seconds + 0.2 * duration
+
+    def _update_gauges(self):
+        metrics.registry.set("extraction_queue_depth", self.queued)
+        metrics.registry.set("extractions_running", self.running)
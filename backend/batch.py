@@ -0,0 +1,261 @@
+"""
+Batch extraction CLI.
+
+Recursively collects the PDFs under the given files and directories and
+extracts them across a pool of worker processes. Each record is appended
+to a JSON Lines file as soon as it is extracted, and every finished file
+is checkpointed to a manifest, so an interrupted run picks up where it
+stopped when started again with the same output.
+
+Usage:
+    python batch.py INPUT [INPUT ...] [-o results.jsonl] [-j WORKERS]
+                    [--manifest PATH] [--excel Course_Outlines.xlsx]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import extractor
+
+# Files queued per worker, so the pool never idles while results are written
+QUEUE_PER_WORKER = 4
+
+_done_hashes = frozenset()
+
+
+def find_pdfs(inputs):
+    """
+    Returns [(path, name)] for every PDF under `inputs`, sorted by path.
+    `name` is the path relative to the input it was found under.
+    """
+    found = {}
+    for item in inputs:
+        if os.path.isfile(item):
+            path = os.path.abspath(item)
+            found.setdefault(path, os.path.basename(item))
+            continue
+        for dirpath, dirnames, filenames in os.walk(item):
+            dirnames.sort()
+            for filename in filenames:
+                if filename.lower().endswith(".pdf"):
+                    path = os.path.abspath(os.path.join(dirpath, filename))
+                    found.setdefault(path, os.path.relpath(path, item))
+    return sorted(found.items())
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _init_worker(done_hashes):
+    global _done_hashes
+    _done_hashes = done_hashes
+
+
+def process_file(path):
+    """
+    Runs in a worker: returns (sha256, data, status), with status "ok",
+    "failed", or "skipped" when the content was already extracted (e.g. a
+    copy of a PDF finished in an earlier run).
+    """
+    file_hash = file_sha256(path)
+    if file_hash in _done_hashes:
+        return file_hash, None, "skipped"
+    data = extractor.extract_data_from_pdf(path)
+    return file_hash, data, "ok" if data else "failed"
+
+
+def read_jsonl(path):
+    """Yields the objects in a JSON Lines file, skipping a torn last line."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def open_append(path):
+    """Opens a JSON Lines file for appending, ending any line torn by a crash."""
+    f = open(path, "a+")
+    if f.tell():
+        f.seek(f.tell() - 1)
+        if f.read(1) != "\n":
+            f.write("\n")
+    return f
+
+
+class Manifest:
+    """
+    Checkpoint of finished files, one JSON line per file. A file counts as
+    done when its path, size and mtime match a finished entry, or (checked
+    in the worker) when its content hash does.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done_files = {}
+        self.done_hashes = set()
+        for entry in read_jsonl(path):
+            if entry.get("status") in ("ok", "skipped"):
+                self.done_files[entry["path"]] = (entry["size"], entry["mtime"])
+                self.done_hashes.add(entry["sha256"])
+        self.file = open_append(path)
+
+    def is_done(self, path):
+        stat = os.stat(path)
+        return self.done_files.get(path) == (stat.st_size, stat.st_mtime)
+
+    def add(self, path, file_hash, status):
+        stat = os.stat(path)
+        entry = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime, "sha256": file_hash, "status": status}
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        if status == "ok":
+            self.done_hashes.add(file_hash)
+
+    def close(self):
+        self.file.close()
+
+
+class Progress:
+    """Prints a files/sec readout to stderr, at most every `interval` seconds."""
+
+    def __init__(self, total, interval=0.5):
+        self.total = total
+        self.start = time.perf_counter()
+        self.last = 0
+        self.interval = interval if sys.stderr.isatty() else 5
+        self.counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    def update(self, status, force=False):
+        if status:
+            self.counts[status] += 1
+        now = time.perf_counter()
+        if not force and now - self.last < self.interval:
+            return
+        self.last = now
+        done = sum(self.counts.values())
+        rate = done / (now - self.start) if now > self.start else 0
+        eta = f"{(self.total - done) / rate:.0f}s" if rate else "?"
+        line = (
+            f"[{done}/{self.total}] {rate:.2f} files/s  ok {self.counts['ok']}  "
+            f"failed {self.counts['failed']}  skipped {self.counts['skipped']}  eta {eta}"
+        )
+        end = "\r" if sys.stderr.isatty() and not force else "\n"
+        print(line, end=end, file=sys.stderr, flush=True)
+
+
+def run(pdfs, output_path, manifest_path, workers):
+    """Extracts `pdfs` ([(path, name)]) and returns the progress counts."""
+    manifest = Manifest(manifest_path)
+    # Records written before a crash but not yet checkpointed are kept
+    done_hashes = manifest.done_hashes | {r.get("File Hash") for r in read_jsonl(output_path)}
+
+    pending = [(path, name) for path, name in pdfs if not manifest.is_done(path)]
+    progress = Progress(len(pdfs))
+    progress.counts["skipped"] = len(pdfs) - len(pending)
+    output = open_append(output_path)
+
+    attempts = {}
+    queue = list(reversed(pending))
+    try:
+        while queue:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(frozenset(done_hashes),))
+            in_flight = {}
+            try:
+                while queue or in_flight:
+                    while queue and len(in_flight) < workers * QUEUE_PER_WORKER:
+                        path, name = queue.pop()
+                        attempts[path] = attempts.get(path, 0) + 1
+                        in_flight[pool.submit(process_file, path)] = (path, name)
+
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        path, name = in_flight.pop(future)
+                        try:
+                            file_hash, data, status = future.result()
+                        except BrokenProcessPool:
+                            in_flight[future] = (path, name)
+                            raise
+                        except Exception as e:
+                            print(f"Error processing {path}: {e}", file=sys.stderr)
+                            manifest.add(path, None, "failed")
+                            progress.update("failed")
+                            continue
+
+                        if status == "ok" and file_hash in done_hashes:
+                            # Same content as a file finished earlier in this run
+                            status = "skipped"
+                        if status == "ok":
+                            data["Source File"] = name
+                            data["File Hash"] = file_hash
+                            output.write(json.dumps(data) + "\n")
+                            output.flush()
+                            done_hashes.add(file_hash)
+                        manifest.add(path, file_hash, status)
+                        progress.update(status)
+                pool.shutdown()
+            except BrokenProcessPool:
+                # A worker crashed; retry the files that were in flight once
+                pool.shutdown(wait=False, cancel_futures=True)
+                for path, name in in_flight.values():
+                    if attempts[path] < 2:
+                        queue.append((path, name))
+                    else:
+                        print(f"Error processing {path}: worker crashed", file=sys.stderr)
+                        manifest.add(path, None, "failed")
+                        progress.update("failed")
+    finally:
+        output.close()
+        manifest.close()
+    progress.update(None, force=True)
+    return progress.counts
+
+
+def write_excel_from_jsonl(output_path, excel_path):
+    max_session = max((r.get("Max_Session", 0) for r in read_jsonl(output_path)), default=0)
+    extractor.write_excel(read_jsonl(output_path), excel_path, max_session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="PDF files or directories to search recursively")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSON Lines file records are appended to")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--manifest", help="checkpoint file (default: OUTPUT.manifest)")
+    parser.add_argument("--excel", help="also write every record in OUTPUT to this Excel file at the end")
+    args = parser.parse_args()
+
+    pdfs = find_pdfs(args.inputs)
+    if not pdfs:
+        print("No PDF files found.")
+        return
+
+    manifest_path = args.manifest or f"{args.output}.manifest"
+    print(f"Found {len(pdfs)} PDFs, extracting with {args.workers} workers")
+    counts = run(pdfs, args.output, manifest_path, max(1, args.workers))
+    print(f"Done: {counts['ok']} extracted, {counts['failed']} failed, {counts['skipped']} already done")
+    print(f"Records: {args.output}")
+
+    if args.excel:
+        write_excel_from_jsonl(args.output, args.excel)
+        print(f"Excel: {args.excel}")
+
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
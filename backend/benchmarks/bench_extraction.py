@@ -0,0 +1,75 @@
+"""
+Times per-file extraction for the two-pass (text, then re-open for tables
+on every page) pipeline against the single-pass pipeline used by
+extract_data_from_pdf, and reports on how many pages table detection ran.
+
+Usage:
+    python benchmarks/bench_extraction.py [pdf ...] [--repeat N]
+
+With no PDFs given, the sample outline in the repository root is used.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+import pdfplumber
+import extractor
+
+DEFAULT_PDF = os.path.join(ROOT_DIR, "View_Print Course Outline.pdf")
+
+
+def two_pass(pdf_path):
+    """The previous pipeline: one open for text, a second for the tables."""
+    full_text = ""
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            full_text += page.extract_text() + "\n"
+    parser = extractor.SessionTableParser()
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            parser.feed(page.extract_tables())
+    return full_text, parser.session_data
+
+
+def single_pass(pdf_path):
+    return extractor.extract_data_from_pdf(pdf_path)
+
+
+def time_it(func, pdf_path, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(pdf_path)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="*", default=[DEFAULT_PDF])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'file':<40} {'pages':>5} {'tables on':>9} {'two-pass (s)':>13} {'single-pass (s)':>16} {'speedup':>8}")
+    for pdf_path in args.pdfs:
+        # Warm up imports and font caches so the first run is not penalised,
+        # and count the pages table detection ran on
+        page_timings = []
+        extractor.extract_data_from_pdf(pdf_path, page_timings=page_timings)
+        pages = len(page_timings)
+        table_pages = sum(1 for t in page_timings if t["tables"] is not None)
+
+        before = statistics.median(time_it(two_pass, pdf_path, args.repeat))
+        after = statistics.median(time_it(single_pass, pdf_path, args.repeat))
+        name = os.path.basename(pdf_path)[:40]
+        print(f"{name:<40} {pages:>5} {table_pages:>9} {before:>13.3f} {after:>16.3f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
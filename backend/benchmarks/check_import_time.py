@@ -0,0 +1,81 @@
+"""
+Import-time regression check for the API server's cold start.
+
+Imports `main` in a fresh interpreter under `python -X importtime`, prints
+the slowest imports, and fails if any of the heavy libraries the server
+loads lazily (pandas, pdfplumber, openpyxl, ...) are imported at startup,
+or if the total import time exceeds --budget seconds.
+
+Usage:
+    python benchmarks/check_import_time.py [--budget SECONDS] [--top N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a PDF is parsed or an export is built
+LAZY_MODULES = ["pandas", "numpy", "pdfplumber", "pdfminer", "pypdfium2", "openpyxl", "pyarrow"]
+
+
+def import_times(module):
+    """Returns [(cumulative_us, self_us, name)] for a fresh import of `module`."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        # Keep the app's database and output directories out of the tree
+        for var in ("DATA_DIR", "OUTPUT_DIR", "UPLOAD_DIR"):
+            env[var] = os.path.join(tmp, var.lower())
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+        )
+    if result.returncode:
+        sys.exit(f"import {module} failed:\n{result.stderr}")
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        times.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget", type=float, default=None, help="fail if importing takes longer (seconds)")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    times = import_times(args.module)
+    total = next(cumulative for cumulative, _, name in times if name.strip() == args.module) / 1e6
+
+    print(f"import {args.module}: {total:.3f}s")
+    print(f"{'cumulative (s)':>14} {'self (s)':>9}  module")
+    for cumulative, self_us, name in sorted(times, reverse=True)[:args.top]:
+        print(f"{cumulative / 1e6:>14.3f} {self_us / 1e6:>9.3f}  {name}")
+
+    problems = []
+    imported = {name.strip() for _, _, name in times}
+    for module in LAZY_MODULES:
+        if module in imported:
+            problems.append(f"{module} is imported at startup; import it where it is used instead")
+    if args.budget is not None and total > args.budget:
+        problems.append(f"import took {total:.3f}s, over the {args.budget:.3f}s budget")
+
+    if problems:
+        print()
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        sys.exit(1)
+    print("\nOK: no heavy modules imported at startup")
+
+
+if __name__ == "__main__":
+    main()
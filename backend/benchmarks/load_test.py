@@ -0,0 +1,232 @@
+"""
+Multi-worker load test for the API server.
+
+For each worker count, starts `uvicorn main:app --workers N` on a fresh
+data directory seeded with records, then runs concurrent clients against
+it for a fixed time: mostly /api/data pages, searches and change polls,
+with a share of /api/upload requests (the sample outline; after the first
+upload these are extraction cache hits, so they exercise the shared store
+rather than the PDF parser). Reports requests/sec and latency per worker
+count.
+
+Afterwards it checks the shared state: the store must hold exactly the
+seeded records plus one per successful upload, and a background job
+submitted to one worker must be visible from every worker while it runs.
+
+Needs httpx. Usage:
+    python benchmarks/load_test.py [--workers 1,2,4] [--concurrency 32]
+                                   [--duration 10] [--write-ratio 0.05]
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+SAMPLE_PDF = os.path.join(ROOT_DIR, "View_Print Course Outline.pdf")
+
+sys.path.insert(0, BACKEND_DIR)
+
+SEARCH_TERMS = ["strategy", "market", "finance", "case", "project", "analysis"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed_store(data_dir, count):
+    """Fills a new store with `count` copies of the golden records."""
+    import store
+
+    golden = [json.load(open(path)) for path in sorted(glob.glob(os.path.join(BENCH_DIR, "golden", "*.json")))]
+    records = []
+    for i in range(count):
+        record = dict(golden[i % len(golden)])
+        record["Course"] = f"{record.get('Course', '')} #{i}"
+        records.append(record)
+    os.makedirs(data_dir, exist_ok=True)
+    store.MasterStore(os.path.join(data_dir, "master_data.db")).append(records)
+
+
+def start_server(workers, port, tmp):
+    env = dict(os.environ)
+    for var in ("DATA_DIR", "OUTPUT_DIR", "UPLOAD_DIR"):
+        env[var] = os.path.join(tmp, var.lower())
+    env["EXTRACT_WORKERS"] = "1"
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+async def wait_ready(client, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/api/data", params={"limit": 1})).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("server did not start")
+
+
+async def run_clients(client, concurrency, duration, write_ratio, pdf_bytes):
+    """Returns (latencies by kind, error count, successful uploads)."""
+    latencies = {"read": [], "upload": []}
+    errors = 0
+    uploads = 0
+    deadline = time.monotonic() + duration
+
+    async def one_client(seed):
+        nonlocal errors, uploads
+        rng = random.Random(seed)
+        while time.monotonic() < deadline:
+            roll = rng.random()
+            start = time.perf_counter()
+            try:
+                if roll < write_ratio:
+                    kind = "upload"
+                    files = {"files": ("outline.pdf", pdf_bytes, "application/pdf")}
+                    response = await client.post("/api/upload", files=files)
+                elif roll < 0.6:
+                    kind = "read"
+                    response = await client.get("/api/data", params={
+                        "limit": 50, "cursor": rng.randrange(1, 400), "fields": "Course,Semester,School",
+                    })
+                elif roll < 0.8:
+                    kind = "read"
+                    response = await client.get("/api/search", params={"q": rng.choice(SEARCH_TERMS)})
+                else:
+                    kind = "read"
+                    response = await client.get("/api/data/changes", params={"since": rng.randrange(1, 400), "limit": 20})
+            except Exception:
+                errors += 1
+                continue
+            latencies[kind].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            elif kind == "upload":
+                uploads += 1
+
+    await asyncio.gather(*(one_client(i) for i in range(concurrency)))
+    return latencies, errors, uploads
+
+
+async def count_records(client):
+    count = 0
+    since = 0
+    while True:
+        page = (await client.get("/api/data/changes", params={"since": since, "fields": "Course"})).json()
+        count += len(page["data"])
+        since = page["seq"]
+        if not page["has_more"]:
+            return count
+
+
+async def check_jobs(client, pdf_bytes):
+    """Submits a job and polls it; every poll must find it, whichever worker answers."""
+    files = [("files", (f"job{i}.pdf", pdf_bytes, "application/pdf")) for i in range(3)]
+    response = await client.post("/api/jobs", files=files)
+    response.raise_for_status()
+    status_url = response.json()["status_url"]
+    missing = 0
+    for _ in range(600):
+        # New connections, so the polls spread across the server processes
+        async with type(client)(base_url=client.base_url) as poller:
+            response = await poller.get(status_url)
+        if response.status_code == 404:
+            missing += 1
+        elif response.json()["status"] in ("completed", "failed"):
+            return missing, response.json()["status"]
+        await asyncio.sleep(0.1)
+    return missing, "timeout"
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run(workers, args, pdf_bytes):
+    import httpx
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_store(os.path.join(tmp, "data_dir"), args.records)
+        port = free_port()
+        server = start_server(workers, port, tmp)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+                await wait_ready(client)
+                latencies, errors, uploads = await run_clients(
+                    client, args.concurrency, args.duration, args.write_ratio, pdf_bytes
+                )
+                missing_polls, job_status = await check_jobs(client, pdf_bytes)
+                count = await count_records(client)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    expected = args.records + uploads + (3 if job_status == "completed" else 0)
+    requests = sum(len(v) for v in latencies.values())
+    return {
+        "workers": workers,
+        "requests": requests,
+        "rps": requests / args.duration,
+        "read_p50": percentile(latencies["read"], 0.5) * 1000,
+        "read_p99": percentile(latencies["read"], 0.99) * 1000,
+        "upload_p50": percentile(latencies["upload"], 0.5) * 1000,
+        "errors": errors,
+        "consistent": count == expected and job_status == "completed" and missing_polls == 0,
+        "records": f"{count}/{expected}",
+        "job": f"{job_status}, {missing_polls} polls not found",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per worker count")
+    parser.add_argument("--records", type=int, default=500, help="records seeded before each run")
+    parser.add_argument("--write-ratio", type=float, default=0.05, help="share of requests that upload")
+    args = parser.parse_args()
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        sys.exit("httpx is needed for the load test (pip install httpx)")
+    with open(SAMPLE_PDF, "rb") as f:
+        pdf_bytes = f.read()
+
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} concurrent clients, {args.duration:.0f}s per run")
+    print(f"{'workers':>7} {'requests':>9} {'req/s':>8} {'read p50 ms':>12} {'read p99 ms':>12} "
+          f"{'upload p50 ms':>14} {'errors':>7}  records   job")
+    failed = False
+    for workers in [int(w) for w in args.workers.split(",") if w]:
+        result = asyncio.run(run(workers, args, pdf_bytes))
+        print(f"{result['workers']:>7} {result['requests']:>9} {result['rps']:>8.1f} {result['read_p50']:>12.1f} "
+              f"{result['read_p99']:>12.1f} {result['upload_p50']:>14.1f} {result['errors']:>7}  "
+              f"{result['records']:<9} {result['job']}")
+        failed |= not result["consistent"] or result["errors"] > 0
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Benchmark suite for the extractor and upload API.
+
+Generates a corpus of synthetic course outlines (see synth.py) of varying
+page and session counts, plus the sample outline in the repository root,
+then times each stage in a fresh process:
+
+    extract      extractor.extract_data_from_pdf per file, with the default
+                 text backend; extract:BACKEND uses that backend instead
+    sessions     extractor.extract_session_table per file
+    excel        extractor.append_to_excel, appending every record in turn
+    upload       POST /api/upload with the whole corpus (needs httpx)
+
+and reports files/sec, pages/sec and peak RSS for each. Extraction output
+(from every extract stage) is compared field by field with the golden JSON
+in benchmarks/golden/, and the run exits non-zero if anything changed.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--repeat N] [--stages extract:pdfium,upload]
+    python benchmarks/run_benchmarks.py --update-golden
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+GOLDEN_DIR = os.path.join(BENCH_DIR, "golden")
+SAMPLE_PDF = os.path.join(ROOT_DIR, "View_Print Course Outline.pdf")
+
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import synth
+
+# name, sessions, filler pages, seed
+CORPUS = [
+    ("outline_s10_p0", 10, 0, 1),
+    ("outline_s30_p4", 30, 4, 2),
+    ("outline_s45_p12", 45, 12, 3),
+    ("outline_s60_p30", 60, 30, 4),
+]
+
+STAGES = ["extract:pdfium", "extract:pdfplumber", "sessions", "excel", "upload"]
+
+
+def build_corpus(corpus_dir):
+    """Writes the synthetic corpus; returns [(name, path, pages)]."""
+    files = []
+    for name, sessions, filler_pages, seed in CORPUS:
+        path = os.path.join(corpus_dir, f"{name}.pdf")
+        pages = synth.generate_outline(path, sessions, filler_pages, seed=seed)
+        files.append((name, path, pages))
+    if os.path.exists(SAMPLE_PDF):
+        import extractor
+        files.append(("sample_outline", SAMPLE_PDF, extractor.count_pages(SAMPLE_PDF)))
+    return files
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return max(own, children) / scale
+
+
+def stage_extract(files, repeat, backend=None):
+    import extractor
+    outputs = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name, path, _ in files:
+            outputs[name] = extractor.extract_data_from_pdf(path, backend=backend)
+    return time.perf_counter() - start, outputs
+
+
+def stage_sessions(files, repeat):
+    import extractor
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, path, _ in files:
+            extractor.extract_session_table(path)
+    return time.perf_counter() - start, None
+
+
+def stage_excel(files, repeat):
+    import extractor
+    records = [extractor.extract_data_from_pdf(path) for _, path, _ in files]
+    elapsed = 0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bench.xlsx")
+            start = time.perf_counter()
+            for record in records:
+                extractor.append_to_excel([record], output)
+            elapsed += time.perf_counter() - start
+    return elapsed, None
+
+
+def stage_upload(files, repeat):
+    try:
+        from fastapi.testclient import TestClient
+    except (ImportError, RuntimeError):
+        print("  upload: skipped (install httpx to run it)")
+        return None, None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Isolate the app's storage and disable the cache so every run parses
+        for var in ("DATA_DIR", "OUTPUT_DIR", "UPLOAD_DIR"):
+            os.environ[var] = os.path.join(tmp, var.lower())
+        os.environ["CACHE_MAX_BYTES"] = "0"
+        import main
+
+        uploads = []
+        for name, path, _ in files:
+            with open(path, "rb") as f:
+                uploads.append(("files", (f"{name}.pdf", f.read(), "application/pdf")))
+
+        with TestClient(main.app) as client:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                response = client.post("/api/upload", files=uploads)
+                response.raise_for_status()
+            return time.perf_counter() - start, None
+
+
+def run_stage(stage, files, repeat):
+    """Runs a stage in this (fresh) process and reports its numbers."""
+    name, _, backend = stage.partition(":")
+    func = globals()[f"stage_{name}"]
+    elapsed, outputs = func(files, repeat, backend) if backend else func(files, repeat)
+    return elapsed, outputs, peak_rss_mb()
+
+
+def compare_golden(outputs):
+    """Returns a list of human-readable differences from the golden files."""
+    problems = []
+    for name, output in outputs.items():
+        golden_path = os.path.join(GOLDEN_DIR, f"{name}.json")
+        if not os.path.exists(golden_path):
+            problems.append(f"{name}: no golden file (run with --update-golden)")
+            continue
+        with open(golden_path, "r") as f:
+            golden = json.load(f)
+        output = json.loads(json.dumps(output))
+        if output is None:
+            problems.append(f"{name}: extraction failed")
+            continue
+        for key in sorted(set(golden) | set(output)):
+            if golden.get(key) != output.get(key):
+                problems.append(f"{name}: '{key}' changed\n    golden: {str(golden.get(key))[:100]!r}\n    now:    {str(output.get(key))[:100]!r}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--update-golden", action="store_true", help="rewrite the golden JSON from this run")
+    args = parser.parse_args()
+
+    stages = [s for s in args.stages.split(",") if s]
+    if args.update_golden and not any(s.split(":")[0] == "extract" for s in stages):
+        stages.insert(0, "extract")
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        files = build_corpus(corpus_dir)
+        total_pages = sum(pages for _, _, pages in files)
+        print(f"Corpus: {len(files)} files, {total_pages} pages")
+        for name, _, pages in files:
+            print(f"  {name:<20} {pages:>3} pages")
+        print()
+
+        context = multiprocessing.get_context("spawn")
+        print(f"{'stage':<20} {'seconds':>9} {'files/s':>9} {'pages/s':>9} {'peak RSS MB':>12}")
+        outputs = {}
+        for stage in stages:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                elapsed, stage_outputs, rss = executor.submit(run_stage, stage, files, args.repeat).result()
+            if elapsed is None:
+                continue
+            if stage_outputs is not None:
+                outputs[stage] = stage_outputs
+            n_files = len(files) * args.repeat
+            n_pages = total_pages * args.repeat
+            rss_text = f"{rss:.1f}" if rss is not None else "n/a"
+            print(f"{stage:<20} {elapsed:>9.3f} {n_files / elapsed:>9.2f} {n_pages / elapsed:>9.2f} {rss_text:>12}")
+
+    if not outputs:
+        return
+
+    if args.update_golden:
+        # From the first extract stage run
+        records = next(iter(outputs.values()))
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        for name, output in records.items():
+            with open(os.path.join(GOLDEN_DIR, f"{name}.json"), "w") as f:
+                json.dump(output, f, indent=4)
+        print(f"\nUpdated {len(records)} golden files in {GOLDEN_DIR}")
+        return
+
+    problems = []
+    for stage, records in outputs.items():
+        problems.extend(f"{stage}: {problem}" for problem in compare_golden(records))
+    print()
+    if problems:
+        print(f"Golden output mismatches ({len(problems)}):")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("Golden outputs: all match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Generates synthetic course outline PDFs laid out like the real outlines:
+the header fields and block fields, optional filler pages, then a
+"Session Plan" table drawn with ruling lines that runs over as many pages
+as it needs.
+
+The PDFs are written directly (Helvetica text and stroked cell borders),
+so no PDF library is needed, and the output is byte-for-byte reproducible
+for a given spec.
+"""
+import random
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 50
+FONT_SIZE = 9
+LINE_HEIGHT = 12
+CHAR_WIDTH = FONT_SIZE * 0.5  # rough Helvetica average, used for wrapping
+
+# Words that never start a field header, so wrapped lines can't end a block early
+WORDS = [
+    "network", "protocol", "analysis", "design", "students", "system", "theory",
+    "model", "practice", "data", "learning", "method", "review", "lab", "reading",
+    "algorithm", "structure", "layer", "routing", "transport", "security",
+    "application", "performance", "simulation", "queue", "packet", "graph",
+    "optimisation", "concept", "example", "tutorial", "problem", "solution",
+]
+
+SESSION_COLUMNS = [
+    ("NO.", 30),
+    ("TOPIC TITLE", 90),
+    ("TOPIC & SUBTOPIC DETAILS", 130),
+    ("READINGS, CASES, ETC.", 100),
+    ("ACTIVITIES", 82),
+    ("IMPORTANT DATES", 80),
+]
+ROWS_PER_PAGE_HINT = 20
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(text, width):
+    """Wraps text to lines that fit `width` points."""
+    max_chars = max(1, int(width / CHAR_WIDTH))
+    lines = []
+    line = ""
+    for word in text.split():
+        candidate = f"{line} {word}" if line else word
+        if len(candidate) > max_chars and line:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines or [""]
+
+
+class _Page:
+    def __init__(self):
+        self.ops = []
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def text(self, x, y, text):
+        self.ops.append(f"BT /F1 {FONT_SIZE} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET")
+
+    def rect(self, x, y, w, h):
+        self.ops.append(f"{x:.2f} {y:.2f} {w:.2f} {h:.2f} re S")
+
+    def content(self):
+        return ("0.5 w\n" + "\n".join(self.ops)).encode("latin-1")
+
+
+class _Document:
+    def __init__(self):
+        self.pages = [_Page()]
+
+    @property
+    def page(self):
+        return self.pages[-1]
+
+    def new_page(self):
+        self.pages.append(_Page())
+
+    def ensure_space(self, height):
+        if self.page.y - height < MARGIN:
+            self.new_page()
+
+    def paragraph(self, text):
+        for line in _wrap(text, PAGE_WIDTH - 2 * MARGIN):
+            self.ensure_space(LINE_HEIGHT)
+            self.page.y -= LINE_HEIGHT
+            self.page.text(MARGIN, self.page.y, line)
+
+    def row(self, cells, widths):
+        """Draws one bordered table row, moving to a new page if needed."""
+        wrapped = [_wrap(cell, width - 6) for cell, width in zip(cells, widths)]
+        height = max(len(lines) for lines in wrapped) * LINE_HEIGHT + 6
+        self.ensure_space(height)
+        top = self.page.y
+        x = MARGIN
+        for lines, width in zip(wrapped, widths):
+            self.page.rect(x, top - height, width, height)
+            for i, line in enumerate(lines):
+                self.page.text(x + 3, top - 3 - (i + 1) * LINE_HEIGHT + 3, line)
+            x += width
+        self.page.y = top - height
+
+    def save(self, path):
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            None,  # Pages, filled in once the page object numbers are known
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        ]
+        page_refs = []
+        for page in self.pages:
+            content = page.content()
+            objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+            content_ref = len(objects)
+            objects.append(
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                % (PAGE_WIDTH, PAGE_HEIGHT, content_ref)
+            )
+            page_refs.append(len(objects))
+        kids = " ".join(f"{ref} 0 R" for ref in page_refs).encode()
+        objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_refs)
+
+        out = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        for offset in offsets:
+            out += b"%010d 00000 n \n" % offset
+        out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+        with open(path, "wb") as f:
+            f.write(out)
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate_outline(path, sessions, filler_pages=0, seed=0):
+    """
+    Writes a synthetic outline to `path` with `sessions` rows in its session
+    table and `filler_pages` pages of appendix text before it.
+    Returns the number of pages written.
+    """
+    rng = random.Random(seed)
+    doc = _Document()
+    code = f"SYN{100 + seed}"
+
+    doc.paragraph(f"Course {code} Synthetic Outline {seed} Semester Winter Semester 2026")
+    doc.paragraph(f"Faculty Name(s) Faculty {seed} Contact faculty{seed}@example.edu")
+    doc.paragraph("School SEAS Credits 3")
+    doc.paragraph("GER Category " + _sentence(rng, 4))
+    doc.paragraph("Teaching Pedagogy Enable: NO")
+    doc.paragraph("Schedule Section 1 02:30 pm to 04:00 pm Mon")
+    doc.paragraph("Prerequisite " + _sentence(rng, 6))
+    doc.paragraph("Antirequisite Not Applicable")
+    doc.paragraph("Corequisite Not Applicable")
+    doc.paragraph("Course Description " + _sentence(rng, 60))
+    doc.paragraph("Course Objectives " + _sentence(rng, 40))
+    doc.paragraph("Learning Outcomes " + _sentence(rng, 40))
+    doc.paragraph("Pedagogy " + _sentence(rng, 10))
+    doc.paragraph("Assessment/Evaluation Quizzes: 30% Mid semester examination: 30% End semester examination: 40%")
+    doc.paragraph("Attendance Policy " + _sentence(rng, 20))
+    doc.paragraph("Project / Assignment Details " + _sentence(rng, 20))
+    doc.paragraph("Course Material")
+    doc.paragraph("Text Book(s): " + _sentence(rng, 12))
+    doc.paragraph("Reference Book(s): " + _sentence(rng, 12))
+    doc.paragraph("Other Course Material: " + _sentence(rng, 8))
+
+    # Filler pages stand in for appendices. They go under a header the
+    # parser stops blocks at but does not extract, as in real outlines, so
+    # the text is scanned without swelling a field past Excel's cell limit
+    if filler_pages:
+        doc.paragraph("Expectation From Students")
+    for _ in range(filler_pages):
+        doc.new_page()
+        while doc.page.y - LINE_HEIGHT * 6 > MARGIN:
+            doc.paragraph(_sentence(rng, 80))
+
+    doc.paragraph("Additional Information " + _sentence(rng, 15))
+
+    doc.new_page()
+    doc.paragraph("Session Plan")
+    doc.page.y -= LINE_HEIGHT
+    widths = [width for _, width in SESSION_COLUMNS]
+    doc.row([name for name, _ in SESSION_COLUMNS], widths)
+    for number in range(1, sessions + 1):
+        doc.row(
+            [
+                str(number),
+                _sentence(rng, rng.randint(1, 4)).title(),
+                _sentence(rng, rng.randint(3, 12)),
+                f"{rng.randint(1, 9)}.{rng.randint(1, 9)}",
+                rng.choice(["N/A", "Quiz", "Lab", "Discussion"]),
+                rng.choice(["N/A", "N/A", f"{rng.randint(1, 28):02d}-03-26"]),
+            ],
+            widths,
+        )
+
+    doc.save(path)
+    return len(doc.pages)
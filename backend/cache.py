@@ -0,0 +1,87 @@
+import json
+import os
+import logging
+import threading
+import uuid
+
+
+class ExtractionCache:
+    """
+    Stores extract_data_from_pdf results on disk, one JSON file per PDF,
+    keyed by the SHA-256 of the PDF bytes and the extractor version.
+
+    Entries are evicted least-recently-used first (by file mtime, which is
+    refreshed on every hit) once the directory grows past `max_bytes`.
+    Bumping the extractor version makes old entries unreachable; they age
+    out through the same eviction.
+    """
+
+    def __init__(self, cache_dir, version, max_bytes):
+        self.cache_dir = cache_dir
+        self.version = str(version)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, file_hash):
+        return os.path.join(self.cache_dir, f"v{self.version}-{file_hash}.json")
+
+    def get(self, file_hash):
+        """Returns the cached result for `file_hash`, or None on a miss."""
+        path = self._path(file_hash)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, file_hash, data):
+        if self.max_bytes <= 0:
+            return
+        path = self._path(file_hash)
+        # Write to a temp name and rename so readers never see a partial file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write extraction cache entry: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until under max_bytes."""
+        with self.lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
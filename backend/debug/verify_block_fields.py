@@ -0,0 +1,34 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import extractor
+
+# Load the dumped text
+DUMP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "full_text_dump.txt")
+with open(DUMP_FILE, "r") as f:
+    full_text = f.read()
+
+def extract_block_regex(start_marker, end_markers):
+    # The original per-field regex that BlockIndex replaces
+    escaped_start = re.escape(start_marker)
+    end_pattern = r"(?=\n\s*(?:" + "|".join(map(re.escape, end_markers)) + r"))"
+    pattern = escaped_start + r"\s*[:\-]?\s*(.*?)\s*" + end_pattern
+    match = re.search(pattern, full_text, re.DOTALL | re.IGNORECASE)
+    if match:
+        return extractor.clean_text(match.group(1))
+    return ""
+
+print("--- Block Field Verification ---")
+block_index = extractor.BlockIndex(full_text)
+mismatches = 0
+for field, markers in extractor.FIELD_MARKERS.items():
+    for marker in markers:
+        expected = extract_block_regex(marker, extractor.BLOCK_HEADERS)
+        actual = block_index.extract(marker)
+        if expected != actual:
+            mismatches += 1
+            print(f"MISMATCH '{marker}':\n  regex: '{expected[:100]}'\n  index: '{actual[:100]}'")
+
+print(f"Mismatches: {mismatches}")
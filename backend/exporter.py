@@ -0,0 +1,105 @@
+import csv
+import io
+
+import extractor
+from responses import dumps
+
+# Rows encoded per chunk yielded to the response
+CHUNK_ROWS = 200
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _batches(records, size=CHUNK_ROWS):
+    """Groups records into lists of `size`, flattened to export layout."""
+    batch = []
+    for record in records:
+        batch.append(extractor.flatten_record(record))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(records, columns):
+    """Yields a CSV export of records, a chunk of rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in _batches(records):
+        for record in batch:
+            writer.writerow([record.get(col, "") for col in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_jsonl(records, columns):
+    """Yields one JSON object per line, keyed by `columns` in order."""
+    for batch in _batches(records):
+        yield b"".join(
+            dumps({col: record.get(col, "") for col in columns}) + b"\n"
+            for record in batch
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_parquet(records, columns):
+    """
+    Yields a Parquet export, one row group per chunk of records.
+    All columns are strings, matching the Excel export.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(col, pa.string()) for col in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in _batches(records):
+            table = pa.Table.from_pydict(
+                {col: [str(record.get(col, "")) for record in batch] for col in columns},
+                schema=schema,
+            )
+            writer.write_table(table)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+EXPORTERS = {
+    "csv": iter_csv,
+    "jsonl": iter_jsonl,
+    "parquet": iter_parquet,
+}
@@ -1,8 +1,24 @@
-import pdfplumber
-import pandas as pd
 import re
+import io
 import os
+import mmap
 import logging
+import time
+from contextlib import ExitStack, contextmanager
+from bisect import bisect_right
+from concurrent.futures.process import BrokenProcessPool
+
+import metrics
+
+# pdfplumber, pandas and openpyxl take most of a second to import, so they
+# are imported where used; the API server then starts without them and its
+# worker processes load pdfplumber in warm_up()
+
+# Where page text comes from: "pdfium" (pdfium_text, several times faster)
+# or "pdfplumber". Tables always come from pdfplumber, and a record the
+# pdfium text doesn't validate is extracted again with pdfplumber.
+TEXT_BACKENDS = ("pdfium", "pdfplumber")
+TEXT_BACKEND = os.getenv("TEXT_BACKEND", "pdfium")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -10,6 +26,10 @@ logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 # Output file
 OUTPUT_FILE = "Course_Outlines.xlsx"
 
+# Bump whenever a change alters extraction output, so cached results
+# from the previous rules are not reused
+EXTRACTOR_VERSION = 2
+
 # Fields to extract
 METADATA_FIELDS = [
     "Course", "Semester", "Faculty Name(s)", "Contact", "School", "Credits",
@@ -20,280 +40,694 @@ METADATA_FIELDS = [
     "Additional Information"
 ]
 
+# Header fields every outline has. When text from the pdfium backend leaves
+# any of them empty, the PDF is extracted again with pdfplumber.
+REQUIRED_FIELDS = ["Course", "Faculty Name(s)", "School"]
+
+# Columns of a session row. Records keep their sessions as a list of rows,
+# [number, title, details, readings, activities, dates] with None for an
+# empty cell, and exports flatten each row to one "Session N" text column
+SESSION_FIELDS = [
+    "Session", "TOPIC TITLE", "TOPIC & SUBTOPIC DETAILS", "READINGS, CASES, ETC.",
+    "ACTIVITIES", "IMPORTANT DATES"
+]
+_SESSION_FIELD_INDEX = {field: i for i, field in enumerate(SESSION_FIELDS)}
+_SESSION_KEY_RE = re.compile(r'^Session (\d+)$')
+
+# Headers that can start a block field. A block ends at the first later line
+# that begins with any of these (case-insensitive).
+BLOCK_HEADERS = [
+    "Course", "Semester", "Faculty Name(s)", "Contact", "School", "Credits",
+    "GER Category", "Teaching Pedagogy Enable", "P/NP Course", "Schedule",
+    "Prerequisite", "Antirequisite", "Corequisite", "Course Description",
+    "Course Objectives", "Learning Outcomes", "Assessment/Evaluation",
+    "Attendance Policy", "Project / Assignment Details", "Course Material",
+    "Additional Information", "Session Plan", 
+    # Add other headers found in text dump to be safe terminators
+    "Pedagogy", "Expectation From Students", "Project / Assignment", "Details"
+]
+
+# Block fields and the start markers to try for each, in order
+FIELD_MARKERS = {
+    "GER Category": ["GER Category"],
+    "Teaching Pedagogy Enable/NP": ["Teaching Pedagogy Enable", "P/NP Course"],
+    "Schedule": ["Schedule"],
+    "Prerequisite": ["Prerequisite"],
+    "Antirequisite": ["Antirequisite"],
+    "Corequisite": ["Corequisite"],
+    "Course Description": ["Course Description"],
+    "Course Objectives": ["Course Objectives"],
+    "Learning Outcomes": ["Learning Outcomes"],
+    "Assessment/Evaluation": ["Assessment/Evaluation", "Assessment", "Evaluation"],
+    "Attendance Policy": ["Attendance Policy"],
+    "Project / Assignment Details": [
+        "Project / Assignment Details", "Project / Assignment", "Project Details", "Assignment Details"
+    ],
+    "Course Material": ["Course Material"],
+    "Additional Information": ["Additional Information"],
+}
+
 def clean_text(text):
     """Cleans extracted text."""
-    if pd.isna(text) or not text:
+    # None, NaN (which is not equal to itself) or empty
+    if text is None or text != text or not text:
         return ""
     text = str(text).strip()
     # Replace multiple spaces with single space
     text = re.sub(r'\s+', ' ', text)
     return text
 
-def extract_session_table(pdf_path):
-    """Extracts the session plan table using pdfplumber."""
-    session_data = []
-    headers_map = {}
-    table_started = False
-    
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            tables = page.extract_tables()
-            
-            for table in tables:
-                if not table: continue
-                
-                # Check if this table has the header
-                # We assume the first row is the header if it contains keywords
-                header_row = [str(cell).lower().replace('\n', ' ') for cell in table[0] if cell]
-                header_str = " ".join(header_row)
-                
-                is_new_header = "topic" in header_str and ("reading" in header_str or "activity" in header_str)
-                
-                start_row_idx = 0
-                
-                if is_new_header:
-                    table_started = True
-                    headers_map = {} # Reset map for new table definition
-                    # Map columns
-                    for idx, col_name in enumerate(table[0]):
-                        if not col_name: continue
-                        c_name = col_name.lower().replace('\n', ' ')
-                        if "topic" in c_name and "title" in c_name: headers_map[idx] = "TOPIC TITLE"
-                        elif "subtopic" in c_name: headers_map[idx] = "TOPIC & SUBTOPIC DETAILS"
-                        elif "reading" in c_name: headers_map[idx] = "READINGS, CASES, ETC."
-                        elif "activit" in c_name: headers_map[idx] = "ACTIVITIES"
-                        elif "date" in c_name: headers_map[idx] = "IMPORTANT DATES"
-                    
-                    start_row_idx = 1 # Skip header
-                
-                # If we haven't found a header yet, and this doesn't look like one, skip
-                if not table_started:
-                    continue
-                    
-                # Process rows
-                for row in table[start_row_idx:]:
-                    # Check if it's a valid session row (starts with a number)
-                    if not row or not row[0]: continue
-                    
-                    session_num_str = str(row[0]).strip()
-                    # Remove trailing .0 if present
-                    if session_num_str.endswith('.0'): session_num_str = session_num_str[:-2]
-                    
-                    if not re.match(r'^\d+$', session_num_str):
-                        continue
-                        
-                    session_num = int(session_num_str)
-                    row_details = []
-                    
-                    for idx, cell in enumerate(row):
-                        if idx == 0: continue # Skip number
-                        if idx in headers_map and cell:
-                            clean_val = clean_text(cell)
-                            if clean_val and clean_val.lower() != 'nan' and clean_val.lower() != 'n/a':
-                                row_details.append(f"{headers_map[idx]}: {clean_val}")
-                    
-                    if row_details:
-                        session_data.append({
-                            "Session": session_num,
-                            "Details": "\n".join(row_details)
-                        })
-    return session_data
-
-def extract_data_from_pdf(pdf_path):
-    """
-    Extracts all data from a PDF (metadata + sessions) using robust full-text regex.
+# Precompiled patterns for BlockIndex
+_ALL_MARKERS = sorted({m for markers in FIELD_MARKERS.values() for m in markers})
+_MARKER_RES = {m: re.compile(re.escape(m), re.IGNORECASE) for m in _ALL_MARKERS}
+_HEADER_LINE_RE = re.compile(r"\s*(?:" + "|".join(map(re.escape, BLOCK_HEADERS)) + ")", re.IGNORECASE)
+_HEADER_PREFIXES = tuple(h.lower() for h in BLOCK_HEADERS)
+_MARKER_SEP_RE = re.compile(r"\s*[:\-]?\s*")
+# Characters that re.IGNORECASE equates with an ASCII letter but str.lower() doesn't
+_CASE_FOLD_EXCEPTIONS = ("\u0131", "\u017f")
+
+class BlockIndex:
+    r"""
+    Index of header positions in a document's full text, built in one pass
+    over its lines.
+
+    A block field's value runs from the first occurrence of its marker (which
+    may appear mid-line) up to the next line that starts with any of
+    BLOCK_HEADERS, giving the same result as the lazy DOTALL regex
+    `marker\s*[:\-]?\s*(.*?)\s*(?=\n\s*(?:headers))`.
     """
-    data = {field: "" for field in METADATA_FIELDS}
-    
-    try:
-        # 1. Get Full Text
-        full_text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                full_text += page.extract_text() + "\n"
-        
-        # 2. Extract Header Fields (Line-based)
-        # We split by lines for the top section to handle the "Course ... Semester" layout accurately
-        lines = full_text.split('\n')
-        
-        # Helper to find line index
-        def find_line_startswith(prefix):
-            for i, line in enumerate(lines):
-                if line.strip().lower().startswith(prefix.lower()):
-                    return i, line
-            return -1, None
-
-        # --- Course & Semester ---
-        c_idx, c_line = find_line_startswith("Course")
-        if c_idx != -1:
-            # Regex to split Course and Semester on the same line
-            match = re.search(r'Course\s+(.*?)\s+Semester\s+(.*)', c_line, re.IGNORECASE)
-            if match:
-                data['Course'] = match.group(1).strip()
-                data['Semester'] = match.group(2).strip()
-                
-                # Check next line for Course continuation
-                # If next line is NOT "Faculty", "School", etc., append it to Course
-                if c_idx + 1 < len(lines):
-                    next_line = lines[c_idx + 1].strip()
-                    # List of keywords that would start a NEW field
-                    keywords = ["Faculty", "School", "Contact", "Credits", "GER", "Pedagogy", "Schedule"]
-                    if next_line and not any(next_line.startswith(k) for k in keywords):
-                        data['Course'] += " " + next_line
-            else:
-                # Fallback if Semester is not on same line
-                data['Course'] = c_line.replace("Course", "").strip()
-
-        # --- Faculty & Contact ---
-        f_idx, f_line = find_line_startswith("Faculty Name(s)")
-        if f_idx != -1:
-            match = re.search(r'Faculty Name\(s\)\s+(.*?)\s+Contact\s+(.*)', f_line, re.IGNORECASE)
-            if match:
-                data['Faculty Name(s)'] = match.group(1).strip()
-                data['Contact'] = match.group(2).strip()
-            else:
-                data['Faculty Name(s)'] = f_line.replace("Faculty Name(s)", "").strip()
-
-        # --- School & Credits ---
-        s_idx, s_line = find_line_startswith("School")
-        if s_idx != -1:
-            match = re.search(r'School\s+(.*?)\s+Credits\s+(.*)', s_line, re.IGNORECASE)
-            if match:
-                data['School'] = match.group(1).strip()
-                data['Credits'] = match.group(2).strip()
+
+    def __init__(self, full_text):
+        self.text = full_text
+
+        # Case-insensitive matching is done on a lowercased copy with plain
+        # string operations, which is much faster than re.IGNORECASE. The
+        # copy is only usable when lowercasing keeps every offset and agrees
+        # with re.IGNORECASE; otherwise fall back to the regexes.
+        lowered = full_text.lower()
+        if len(lowered) != len(full_text) or any(c in full_text for c in _CASE_FOLD_EXCEPTIONS):
+            lowered = None
+
+        # Offsets of lines (after a newline) that begin with a header
+        self.header_starts = []
+        offset = 0
+        for i, line in enumerate((lowered or full_text).split('\n')):
+            if i:
+                if lowered is not None:
+                    is_header = line.lstrip().startswith(_HEADER_PREFIXES)
+                else:
+                    is_header = _HEADER_LINE_RE.match(line) is not None
+                if is_header:
+                    self.header_starts.append(offset)
+            offset += len(line) + 1
+
+        # End offset of the first occurrence of each marker
+        self.marker_ends = {}
+        for marker, marker_re in _MARKER_RES.items():
+            if lowered is not None:
+                pos = lowered.find(marker.lower())
+                if pos != -1:
+                    self.marker_ends[marker] = pos + len(marker)
             else:
-                data['School'] = s_line.replace("School", "").strip()
+                found = marker_re.search(full_text)
+                if found:
+                    self.marker_ends[marker] = found.end()
 
-        # 3. Extract Block Fields (Regex DOTALL)
-        # We use the full_text for this to handle multi-line blocks easily
-        
-        def extract_block(start_marker, end_markers):
-            # Escape start marker
-            escaped_start = re.escape(start_marker)
-            
-            # End markers should be at the start of a line (preceded by \n)
-            # This prevents matching words inside the text (e.g. "course" in description)
-            end_pattern = r"(?=\n\s*(?:" + "|".join(map(re.escape, end_markers)) + r"))"
-            
-            pattern = escaped_start + r"\s*[:\-]?\s*(.*?)\s*" + end_pattern
-            match = re.search(pattern, full_text, re.DOTALL | re.IGNORECASE)
-            if match:
-                return clean_text(match.group(1))
+    def extract(self, marker):
+        """Returns the cleaned text of the block started by `marker`, or ""."""
+        marker_end = self.marker_ends.get(marker)
+        if marker_end is None:
+            return ""
+        start = _MARKER_SEP_RE.match(self.text, marker_end).end()
+        i = bisect_right(self.header_starts, start)
+        if i == len(self.header_starts):
             return ""
+        return clean_text(self.text[start:self.header_starts[i]])
 
-        # Define the order of fields to help with "end markers"
-        # We'll use a list of all potential next headers as end markers
-        all_headers = [
-            "Course", "Semester", "Faculty Name(s)", "Contact", "School", "Credits",
-            "GER Category", "Teaching Pedagogy Enable", "P/NP Course", "Schedule",
-            "Prerequisite", "Antirequisite", "Corequisite", "Course Description",
-            "Course Objectives", "Learning Outcomes", "Assessment/Evaluation",
-            "Attendance Policy", "Project / Assignment Details", "Course Material",
-            "Additional Information", "Session Plan", 
-            # Add other headers found in text dump to be safe terminators
-            "Pedagogy", "Expectation From Students", "Project / Assignment", "Details"
-        ]
-        
-        # Map fields to their start markers
-        field_markers = {
-            "GER Category": "GER Category",
-            "Teaching Pedagogy Enable/NP": "Teaching Pedagogy Enable", # Also check P/NP
-            "Schedule": "Schedule",
-            "Prerequisite": "Prerequisite",
-            "Antirequisite": "Antirequisite",
-            "Corequisite": "Corequisite",
-            "Course Description": "Course Description",
-            "Course Objectives": "Course Objectives",
-            "Learning Outcomes": "Learning Outcomes",
-            "Assessment/Evaluation": "Assessment/Evaluation", # Also check Assessment
-            "Attendance Policy": "Attendance Policy",
-            "Project / Assignment Details": "Project / Assignment Details", # Also Project Details
-            "Course Material": "Course Material",
-            "Additional Information": "Additional Information"
-        }
-
-        for field, marker in field_markers.items():
-            val = None
-            
-            # Special handling for variants
-            if field == "Teaching Pedagogy Enable/NP":
-                val = extract_block("Teaching Pedagogy Enable", all_headers)
-                if not val: val = extract_block("P/NP Course", all_headers)
-                
-            elif field == "Assessment/Evaluation":
-                val = extract_block("Assessment/Evaluation", all_headers)
-                if not val: val = extract_block("Assessment", all_headers)
-                if not val: val = extract_block("Evaluation", all_headers)
-                
-            elif field == "Project / Assignment Details":
-                # Try full header first
-                val = extract_block("Project / Assignment Details", all_headers)
-                # Try split header (just "Project / Assignment")
-                if not val: val = extract_block("Project / Assignment", all_headers)
-                if not val: val = extract_block("Project Details", all_headers)
-                if not val: val = extract_block("Assignment Details", all_headers)
-                
-            else:
-                val = extract_block(marker, all_headers)
-            
-            if val:
-                data[field] = val
+class SessionTableParser:
+    """
+    Incrementally parses session plan rows out of the tables on each page.
+    The header column map carries over between pages, so a table that
+    continues onto the next page keeps its column meaning.
+    """
 
-        # --- Specific Formatting for Course Material ---
-        # The user wants this organized.
-        cm_text = data['Course Material']
-        if cm_text:
-            formatted_cm = ""
+    def __init__(self):
+        self.session_data = []
+        self.headers_map = {}
+        self.table_started = False
+        self.table_ended = False
+
+    def wants_page(self, page_text):
+        """
+        Cheap check on a page's text for whether table detection is worth
+        running on it: from the "Session Plan" heading (or the table's own
+        header row) until the table has ended.
+        """
+        if self.table_ended:
+            return False
+        if self.table_started:
+            return True
+        text = page_text.lower()
+        return "session plan" in text or ("topic" in text and ("reading" in text or "activit" in text))
+
+    def feed(self, tables):
+        """Consumes the tables found on one page."""
+        # A page without any table once the session table has started means
+        # the table is over; later pages need no table detection
+        if self.table_started and not tables:
+            self.table_ended = True
+
+        for table in tables:
+            if not table: continue
             
-            # Helper to extract section
-            def get_section(key, stop_keys):
-                pattern = re.escape(key) + r"\s*[:\-]?\s*(.*?)\s*(?=" + "|".join(map(re.escape, stop_keys)) + r"|$)"
-                m = re.search(pattern, cm_text, re.IGNORECASE | re.DOTALL)
-                return m.group(1).strip() if m else None
-
-            # 1. Text Books
-            tb = get_section("Text Book(s)", ["Reference Book", "Other Course Material"])
-            if not tb: tb = get_section("Text Book", ["Reference Book", "Other Course Material"])
+            # Check if this table has the header
+            # We assume the first row is the header if it contains keywords
+            header_row = [str(cell).lower().replace('\n', ' ') for cell in table[0] if cell]
+            header_str = " ".join(header_row)
             
-            if tb:
-                formatted_cm += f"Text Book(s):\n{tb}\n\n"
+            is_new_header = "topic" in header_str and ("reading" in header_str or "activity" in header_str)
             
-            # 2. Reference Books
-            rb = get_section("Reference Book(s)", ["Text Book", "Other Course Material"])
-            if not rb: rb = get_section("Reference Book", ["Text Book", "Other Course Material"])
+            start_row_idx = 0
             
-            if rb:
-                formatted_cm += f"Reference Book(s):\n{rb}\n\n"
+            if is_new_header:
+                self.table_started = True
+                self.headers_map = {} # Reset map for new table definition
+                # Map columns
+                for idx, col_name in enumerate(table[0]):
+                    if not col_name: continue
+                    c_name = col_name.lower().replace('\n', ' ')
+                    if "topic" in c_name and "title" in c_name: self.headers_map[idx] = "TOPIC TITLE"
+                    elif "subtopic" in c_name: self.headers_map[idx] = "TOPIC & SUBTOPIC DETAILS"
+                    elif "reading" in c_name: self.headers_map[idx] = "READINGS, CASES, ETC."
+                    elif "activit" in c_name: self.headers_map[idx] = "ACTIVITIES"
+                    elif "date" in c_name: self.headers_map[idx] = "IMPORTANT DATES"
                 
-            # 3. Other Course Material
-            other = get_section("Other Course Material", ["Text Book", "Reference Book"])
+                start_row_idx = 1 # Skip header
             
-            if other:
-                formatted_cm += f"Other Course Material:\n{other}\n\n"
+            # If we haven't found a header yet, and this doesn't look like one, skip
+            if not self.table_started:
+                continue
                 
-            # If regex split failed but we have text, just use the cleaned text
-            if not formatted_cm:
-                formatted_cm = cm_text
-                
-            data['Course Material'] = formatted_cm.strip()
+            # Process rows
+            for row in table[start_row_idx:]:
+                self._add_row(row)
 
-        # 4. Extract Sessions
-        sessions = extract_session_table(pdf_path)
+    def _add_row(self, row):
+        # Check if it's a valid session row (starts with a number)
+        if not row or not row[0]: return
+        
+        session_num_str = str(row[0]).strip()
+        # Remove trailing .0 if present
+        if session_num_str.endswith('.0'): session_num_str = session_num_str[:-2]
         
-        # Flatten session data
-        max_session = 0
-        for s in sessions:
-            s_num = s['Session']
-            s_details = s['Details']
-            data[f'Session {s_num}'] = s_details
-            max_session = max(max_session, s_num)
+        if not re.match(r'^\d+$', session_num_str):
+            return
+            
+        session = [int(session_num_str)] + [None] * (len(SESSION_FIELDS) - 1)
         
-        data['Max_Session'] = max_session
+        for idx, cell in enumerate(row):
+            if idx == 0: continue # Skip number
+            if idx in self.headers_map and cell:
+                clean_val = clean_text(cell)
+                if clean_val and clean_val.lower() != 'nan' and clean_val.lower() != 'n/a':
+                    pos = _SESSION_FIELD_INDEX[self.headers_map[idx]]
+                    # Two columns mapped to the same field share its cell
+                    session[pos] = clean_val if session[pos] is None else f"{session[pos]}\n{clean_val}"
         
-        return data
+        if any(value is not None for value in session[1:]):
+            self.session_data.append(session)
+
+def warm_up():
+    """Imports the PDF libraries, so the first extraction doesn't pay for it."""
+    import pdfplumber  # noqa: F401
+    if TEXT_BACKEND == "pdfium":
+        import pdfium_text  # noqa: F401
+
+def describe_source(source):
+    """Short label for a PDF source in log messages."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return f"<{len(source)} byte PDF>"
+    return str(source)
+
+@contextmanager
+def open_pdf(source, pages=None):
+    """
+    Opens a PDF from a file path, a bytes object or a binary file object.
+    Paths are memory-mapped, so pdfminer's many small seeks and reads don't
+    each go through the file system.
+    """
+    import pdfplumber
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        with pdfplumber.open(io.BytesIO(source), pages=pages) as pdf:
+            yield pdf
+    elif isinstance(source, (str, os.PathLike)) and os.path.getsize(source) > 0:
+        with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with pdfplumber.open(mapped, pages=pages) as pdf:
+                yield pdf
+    else:
+        with pdfplumber.open(source, pages=pages) as pdf:
+            yield pdf
+
+def iter_pages(pdf_path, tables=True, timings=None, page_numbers=None, backend=None):
+    """
+    Yields (page_text, page_tables) for each page in order.
+
+    Each page's layout is analysed once for both text and tables, then its
+    cached character and layout objects are released before moving on, so
+    memory stays flat however long the document is.
+
+    `tables` may be a callable taking the page text; table detection (the
+    most expensive step) then only runs on pages it returns True for, and
+    page_tables is None for the others. If `timings` is a list, a dict with
+    each page's text and table extraction seconds is appended to it.
+    `page_numbers` (1-based) restricts the pages read. `backend` is one of
+    TEXT_BACKENDS (default TEXT_BACKEND). `pdf_path` may be anything
+    open_pdf accepts.
+    """
+    backend = backend or TEXT_BACKEND
+    if backend not in TEXT_BACKENDS:
+        raise ValueError(f"Unknown text backend {backend!r}, expected one of {TEXT_BACKENDS}")
+    if backend == "pdfium":
+        yield from _iter_pdfium_pages(pdf_path, tables, timings, page_numbers)
+        return
+
+    with open_pdf(pdf_path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            start = time.perf_counter()
+            page_text = page.extract_text()
+            text_done = time.perf_counter()
+
+            page_tables = None
+            if tables is True or (callable(tables) and tables(page_text)):
+                page_tables = page.extract_tables()
+            page.close()
+
+            if timings is not None:
+                timings.append({
+                    "page": page.page_number,
+                    "backend": backend,
+                    "text": text_done - start,
+                    "tables": time.perf_counter() - text_done if page_tables is not None else None,
+                })
+            yield page_text, page_tables
+
+def _iter_pdfium_pages(pdf_path, tables, timings, page_numbers):
+    """iter_pages for the pdfium backend; pdfplumber is only opened for tables."""
+    import pdfium_text
+
+    with ExitStack() as stack:
+        doc = pdfium_text.open_document(pdf_path)
+        stack.callback(doc.close)
+        plumber_pdf = None
+        for number in page_numbers or range(1, len(doc) + 1):
+            start = time.perf_counter()
+            page = doc[number - 1]
+            page_text = pdfium_text.page_text(page)
+            page.close()
+            text_done = time.perf_counter()
+
+            page_tables = None
+            if tables is True or (callable(tables) and tables(page_text)):
+                if plumber_pdf is None:
+                    plumber_pdf = stack.enter_context(open_pdf(pdf_path))
+                plumber_page = plumber_pdf.pages[number - 1]
+                page_tables = plumber_page.extract_tables()
+                plumber_page.close()
+
+            if timings is not None:
+                timings.append({
+                    "page": number,
+                    "backend": "pdfium",
+                    "text": text_done - start,
+                    "tables": time.perf_counter() - text_done if page_tables is not None else None,
+                })
+            yield page_text, page_tables
+
+def extract_session_table(pdf_path):
+    """
+    Extracts the session plan table using pdfplumber.
+    `pdf_path` may also be a bytes object or a binary file object.
+    """
+    parser = SessionTableParser()
+    for _, tables in iter_pages(pdf_path, tables=parser.wants_page):
+        if tables is not None:
+            parser.feed(tables)
+    return parser.session_data
+
+def parse_text_fields(full_text):
+    """Extracts the metadata fields from a document's full text."""
+    data = {field: "" for field in METADATA_FIELDS}
+
+    # 1. Extract Header Fields (Line-based)
+    # We split by lines for the top section to handle the "Course ... Semester" layout accurately
+    lines = full_text.split('\n')
+    
+    # Helper to find line index
+    def find_line_startswith(prefix):
+        for i, line in enumerate(lines):
+            if line.strip().lower().startswith(prefix.lower()):
+                return i, line
+        return -1, None
+
+    # --- Course & Semester ---
+    c_idx, c_line = find_line_startswith("Course")
+    if c_idx != -1:
+        # Regex to split Course and Semester on the same line
+        match = re.search(r'Course\s+(.*?)\s+Semester\s+(.*)', c_line, re.IGNORECASE)
+        if match:
+            data['Course'] = match.group(1).strip()
+            data['Semester'] = match.group(2).strip()
+            
+            # Check next line for Course continuation
+            # If next line is NOT "Faculty", "School", etc., append it to Course
+            if c_idx + 1 < len(lines):
+                next_line = lines[c_idx + 1].strip()
+                # List of keywords that would start a NEW field
+                keywords = ["Faculty", "School", "Contact", "Credits", "GER", "Pedagogy", "Schedule"]
+                if next_line and not any(next_line.startswith(k) for k in keywords):
+                    data['Course'] += " " + next_line
+        else:
+            # Fallback if Semester is not on same line
+            data['Course'] = c_line.replace("Course", "").strip()
+
+    # --- Faculty & Contact ---
+    f_idx, f_line = find_line_startswith("Faculty Name(s)")
+    if f_idx != -1:
+        match = re.search(r'Faculty Name\(s\)\s+(.*?)\s+Contact\s+(.*)', f_line, re.IGNORECASE)
+        if match:
+            data['Faculty Name(s)'] = match.group(1).strip()
+            data['Contact'] = match.group(2).strip()
+        else:
+            data['Faculty Name(s)'] = f_line.replace("Faculty Name(s)", "").strip()
+
+    # --- School & Credits ---
+    s_idx, s_line = find_line_startswith("School")
+    if s_idx != -1:
+        match = re.search(r'School\s+(.*?)\s+Credits\s+(.*)', s_line, re.IGNORECASE)
+        if match:
+            data['School'] = match.group(1).strip()
+            data['Credits'] = match.group(2).strip()
+        else:
+            data['School'] = s_line.replace("School", "").strip()
+
+    # 2. Extract Block Fields
+    # Header positions are indexed once; each field is sliced up to the next header line
+    block_index = BlockIndex(full_text)
+    for field, markers in FIELD_MARKERS.items():
+        # Try each marker variant in turn until one yields text
+        for marker in markers:
+            val = block_index.extract(marker)
+            if val:
+                data[field] = val
+                break
+
+    # --- Specific Formatting for Course Material ---
+    # The user wants this organized.
+    cm_text = data['Course Material']
+    if cm_text:
+        formatted_cm = ""
+        
+        # Helper to extract section
+        def get_section(key, stop_keys):
+            pattern = re.escape(key) + r"\s*[:\-]?\s*(.*?)\s*(?=" + "|".join(map(re.escape, stop_keys)) + r"|$)"
+            m = re.search(pattern, cm_text, re.IGNORECASE | re.DOTALL)
+            return m.group(1).strip() if m else None
+
+        # 1. Text Books
+        tb = get_section("Text Book(s)", ["Reference Book", "Other Course Material"])
+        if not tb: tb = get_section("Text Book", ["Reference Book", "Other Course Material"])
+        
+        if tb:
+            formatted_cm += f"Text Book(s):\n{tb}\n\n"
+        
+        # 2. Reference Books
+        rb = get_section("Reference Book(s)", ["Text Book", "Other Course Material"])
+        if not rb: rb = get_section("Reference Book", ["Text Book", "Other Course Material"])
+        
+        if rb:
+            formatted_cm += f"Reference Book(s):\n{rb}\n\n"
+            
+        # 3. Other Course Material
+        other = get_section("Other Course Material", ["Text Book", "Reference Book"])
+        
+        if other:
+            formatted_cm += f"Other Course Material:\n{other}\n\n"
+            
+        # If regex split failed but we have text, just use the cleaned text
+        if not formatted_cm:
+            formatted_cm = cm_text
+            
+        data['Course Material'] = formatted_cm.strip()
+
+    return data
+
+def build_record(full_text, sessions):
+    """Combines the metadata fields parsed from the text with the session rows."""
+    # 2. Extract Metadata Fields from the text
+    with metrics.span("extract_block"):
+        data = parse_text_fields(full_text)
+
+    # 3. Keep the session rows as they are; exports flatten them
+    data['Sessions'] = sessions
+    data['Max_Session'] = max((s[0] for s in sessions), default=0)
+    
+    return data
+
+def session_details(session):
+    """The "FIELD: value" lines a flattened "Session N" column holds for one row."""
+    return "\n".join(
+        f"{field}: {value}" for field, value in zip(SESSION_FIELDS[1:], session[1:]) if value
+    )
+
+def flatten_record(record):
+    """
+    Returns a record in export layout, with its session rows replaced by one
+    "Session N" text key per session (a later row wins a repeated number).
+    Records without "Sessions" are returned unchanged.
+    """
+    if "Sessions" not in record:
+        return record
+    flat = {}
+    for key, value in record.items():
+        if key == "Sessions":
+            for session in value:
+                flat[f"Session {session[0]}"] = session_details(session)
+        else:
+            flat[key] = value
+    return flat
+
+def structure_sessions(record):
+    """
+    Converts a record stored in the old layout, with "Session N" text keys,
+    to session rows. Returns the record unchanged if it has no such keys.
+    """
+    session_keys = [key for key in record if _SESSION_KEY_RE.match(key)]
+    if not session_keys:
+        return record
+    sessions = []
+    converted = {}
+    for key, value in record.items():
+        match = _SESSION_KEY_RE.match(key)
+        if not match:
+            converted[key] = value
+            continue
+        session = [int(match.group(1))] + [None] * (len(SESSION_FIELDS) - 1)
+        for line in str(value or "").split("\n"):
+            field, _, text = line.partition(": ")
+            pos = _SESSION_FIELD_INDEX.get(field)
+            if pos and text:
+                session[pos] = text if session[pos] is None else f"{session[pos]}\n{text}"
+        sessions.append(session)
+    sessions.sort(key=lambda s: s[0])
+    # The rows go just before Max_Session, as build_record places them
+    result = {}
+    for key, value in converted.items():
+        if key == "Max_Session" and "Sessions" not in result:
+            result["Sessions"] = sessions
+        result[key] = value
+    result.setdefault("Sessions", sessions)
+    return result
+
+def missing_required_fields(record):
+    """The REQUIRED_FIELDS a record has no value for."""
+    return [field for field in REQUIRED_FIELDS if not record.get(field)]
+
+def _with_fallback(pdf_path, backend, collect):
+    """
+    Returns (record, intermediates) built from collect(backend), or from
+    collect("pdfplumber") if that raised or its record is missing any
+    REQUIRED_FIELDS. `collect` returns intermediates (see
+    record_from_intermediates).
+    """
+    backend = backend or TEXT_BACKEND
+    if backend == "pdfplumber":
+        intermediates = collect(backend)
+        return record_from_intermediates(intermediates)[0], intermediates
+
+    start = time.perf_counter()
+    try:
+        intermediates = collect(backend)
+        record = record_from_intermediates(intermediates)[0]
+        missing = missing_required_fields(record)
+        reason = f"{', '.join(missing)} missing" if missing else None
+    except BrokenProcessPool:
+        raise
+    except Exception as e:
+        reason = f"failed ({e})"
+    if reason is None:
+        return record, intermediates
+
+    logging.info(f"{describe_source(pdf_path)}: {backend} text {reason}, retrying with pdfplumber")
+    # Time lost to the discarded attempt
+    metrics.observe_stage("text_fallback", time.perf_counter() - start)
+    intermediates = collect("pdfplumber")
+    return record_from_intermediates(intermediates)[0], intermediates
+
+def _collect_pages(pdf_path, backend, page_timings):
+    # Tables are only detected on pages from the Session Plan onwards, so
+    # the session parser runs as pages arrive to tell which those are
+    pages = []
+    tables_by_page = {}
+    session_parser = SessionTableParser()
+    for page_text, tables in iter_pages(pdf_path, tables=session_parser.wants_page, timings=page_timings, backend=backend):
+        if tables is not None:
+            session_parser.feed(tables)
+            tables_by_page[len(pages)] = tables
+        pages.append(page_text)
+    return {"backend": backend, "pages": pages, "tables": tables_by_page}
+
+def record_from_intermediates(intermediates):
+    """
+    Builds a record from what parsing a PDF produced: {"pages": [page
+    text], "tables": {page index: tables}}, with tables for at least every
+    page table detection ran on. This is the whole field stage, so stored
+    intermediates can be re-run through changed rules without the PDF.
+
+    Returns (record, missing_pages): the indexes of pages the session table
+    rules now want tables for but that have none stored. A record with
+    missing pages may lack session rows only the PDF can supply.
+    """
+    tables_by_page = {int(index): tables for index, tables in intermediates["tables"].items()}
+    session_parser = SessionTableParser()
+    missing_pages = []
+    for index, page_text in enumerate(intermediates["pages"]):
+        if not session_parser.wants_page(page_text):
+            continue
+        if index in tables_by_page:
+            session_parser.feed(tables_by_page[index])
+        else:
+            missing_pages.append(index)
+    full_text = "".join(page_text + "\n" for page_text in intermediates["pages"])
+    return build_record(full_text, session_parser.session_data), missing_pages
+
+def extract_data_from_pdf(pdf_path, page_timings=None, backend=None, intermediates=None):
+    """
+    Extracts all data from a PDF (metadata + sessions) using robust full-text regex.
+    `pdf_path` may also be a bytes object or a binary file object.
+    Pass a list as `page_timings` to collect per-page extraction times, and
+    a dict as `intermediates` to have it filled with the page text and
+    tables the record was built from (see record_from_intermediates).
+    `backend` overrides TEXT_BACKEND; unless it is "pdfplumber", a record
+    missing any REQUIRED_FIELDS is extracted again with pdfplumber.
+    """
+    try:
+        # 1. Get Full Text and Session Tables in a single pass over the pages
+        if page_timings is None:
+            page_timings = []
+        record, collected = _with_fallback(pdf_path, backend, lambda b: _collect_pages(pdf_path, b, page_timings))
+        metrics.observe_pages(page_timings)
+        if intermediates is not None:
+            intermediates.update(collected)
+
+        table_pages = sum(1 for t in page_timings if t["tables"] is not None)
+        logging.debug(f"{describe_source(pdf_path)}: table detection ran on {table_pages}/{len(page_timings)} pages")
+
+        return record
 
     except Exception as e:
-        print(f"Error processing {pdf_path}: {e}")
+        print(f"Error processing {describe_source(pdf_path)}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+# Smallest page range worth handing to a separate worker
+MIN_PAGES_PER_RANGE = 4
+
+def count_pages(pdf_path):
+    """Number of pages in a PDF, read with pdfium when that is the text backend."""
+    if TEXT_BACKEND == "pdfium":
+        import pdfium_text
+
+        doc = pdfium_text.open_document(pdf_path)
+        try:
+            return len(doc)
+        finally:
+            doc.close()
+    with open_pdf(pdf_path) as pdf:
+        return len(pdf.pages)
+
+def extract_page_range(pdf_path, first_page, last_page, backend=None):
+    """
+    Extracts text and tables from pages first_page..last_page (1-based,
+    inclusive). Runs in a worker process for extract_data_from_pdf_parallel.
+    """
+    timings = []
+    page_numbers = list(range(first_page, last_page + 1))
+    pages = list(iter_pages(pdf_path, timings=timings, page_numbers=page_numbers, backend=backend))
+    return pages, timings
+
+def _collect_ranges(pdf_path, executor, ranges, backend, page_timings):
+    futures = [executor.submit(extract_page_range, pdf_path, first, last, backend) for first, last in ranges]
+
+    page_texts = []
+    tables_by_page = {}
+    for future in futures:
+        pages, timings = future.result()
+        metrics.observe_pages(timings)
+        if page_timings is not None:
+            page_timings.extend(timings)
+        for page_text, tables in pages:
+            tables_by_page[len(page_texts)] = tables
+            page_texts.append(page_text)
+
+    return {"backend": backend, "pages": page_texts, "tables": tables_by_page}
+
+def extract_data_from_pdf_parallel(pdf_path, executor, parts, page_timings=None, backend=None, intermediates=None):
+    """
+    Same result as extract_data_from_pdf, but the document's pages are split
+    into `parts` contiguous ranges extracted concurrently on `executor`
+    (a ProcessPoolExecutor).
+
+    Ranges are merged back in page order and session tables are fed to one
+    parser, so a table continuing across a range boundary keeps its column
+    map. Every page in a range gets table detection, since a worker can't
+    know whether the session table started in an earlier range; the merge
+    applies the same page selection as the serial path. `intermediates`
+    then holds the tables of every page.
+
+    Only the workers open the PDF (the page count comes from one too), so
+    the calling process never imports or runs the PDF libraries.
+    """
+    try:
+        total = executor.submit(count_pages, pdf_path).result()
+        # Don't split so finely that opening the PDF in each worker dominates
+        parts = max(1, min(parts, total // MIN_PAGES_PER_RANGE))
+        size = -(-total // parts) if total else 1
+        ranges = [(first, min(first + size - 1, total)) for first in range(1, total + 1, size)]
+
+        record, collected = _with_fallback(
+            pdf_path, backend, lambda b: _collect_ranges(pdf_path, executor, ranges, b, page_timings)
+        )
+        if intermediates is not None:
+            intermediates.update(collected)
+        return record
+
+    except BrokenProcessPool:
+        # Let the caller replace the pool
+        raise
+    except Exception as e:
+        print(f"Error processing {describe_source(pdf_path)}: {e}")
         import traceback
         traceback.print_exc()
         return None
@@ -306,8 +740,14 @@ def append_to_excel(new_data_list, output_file):
     if not new_data_list:
         return
 
+    with metrics.span("append_to_excel"):
+        _append_to_excel(new_data_list, output_file)
+
+def _append_to_excel(new_data_list, output_file):
+    import pandas as pd
+
     # Create DataFrame from new data
-    df = pd.DataFrame(new_data_list)
+    df = pd.DataFrame([flatten_record(record) for record in new_data_list])
     
     # 1. Determine max session in NEW data
     new_max_session = 0
@@ -341,9 +781,7 @@ def append_to_excel(new_data_list, output_file):
     global_max_session = max(new_max_session, existing_max_session)
 
     # 4. Construct final column list
-    final_cols = METADATA_FIELDS.copy()
-    for i in range(1, int(global_max_session) + 1):
-        final_cols.append(f'Session {i}')
+    final_cols = export_columns(global_max_session)
     
     # 5. Reindex and Concatenate
     # Ensure new df has all columns
@@ -370,6 +808,28 @@ def append_to_excel(new_data_list, output_file):
     except Exception as e:
         print(f"Error saving Excel: {e}")
 
+def export_columns(max_session):
+    """Column layout for exports: the metadata fields, then Session 1..max_session."""
+    return METADATA_FIELDS + [f'Session {i}' for i in range(1, int(max_session) + 1)]
+
+def write_excel(records, output_file, max_session):
+    """
+    Writes records to a new Excel file, one row at a time.
+    Uses openpyxl's write-only mode so memory stays flat however many
+    records are streamed in.
+    """
+    from openpyxl import Workbook
+
+    with metrics.span("write_excel"):
+        columns = export_columns(max_session)
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(columns)
+        for record in records:
+            record = flatten_record(record)
+            ws.append([record.get(col, "") for col in columns])
+        wb.save(output_file)
+
 def main():
     # Find PDF files
     root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
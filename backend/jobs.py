@@ -0,0 +1,227 @@
+import asyncio
+import os
+import time
+import uuid
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+# Finished jobs are kept this long (seconds) so clients can poll the result
+JOB_TTL = float(os.getenv("JOB_TTL", 3600))
+# An unfinished job whose process has not touched it in this long (seconds)
+# is reported as failed: that process stopped, and jobs do not resume
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", 60))
+JOB_HEARTBEAT_SECONDS = JOB_STALE_SECONDS / 4
+JOB_ABANDONED_ERROR = "The server process running this job stopped before it finished."
+
+
+class Job:
+    """A batch of uploaded PDFs processed in the background."""
+
+    def __init__(self, files):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.created = time.time()
+        self.finished = None
+        self.error = None
+        self.download_url = None
+        self.files = [
+            {
+                "filename": filename,
+                "source": source,
+                "sha256": file_hash,
+                "status": "queued",
+                "started": None,
+                "finished": None,
+                "duration": None,
+                "data": None,
+                "error": None,
+            }
+            for source, filename, file_hash in files
+        ]
+
+    @property
+    def pending(self):
+        return sum(1 for f in self.files if f["status"] in ("queued", "processing"))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created": self.created,
+            "finished": self.finished,
+            "error": self.error,
+            "total": len(self.files),
+            "completed": len(self.files) - self.pending,
+            "download_url": self.download_url,
+            "files": [self.file_dict(index) for index in range(len(self.files))],
+        }
+
+    def file_dict(self, index):
+        return {k: v for k, v in self.files[index].items() if k != "source"}
+
+
+class JobManager:
+    """
+    In-process job queue. Each file of a job is a separate queue item so a
+    large batch is spread over all consumers and per-file progress is visible
+    while the batch runs.
+
+    `extract` is a coroutine function (source, filename, sha256, on_start=)
+    -> dict or None, which awaits on_start() when the file stops waiting
+    and its processing starts.
+    `on_complete` is called from a thread with (job, extracted_data_list)
+    once every file of the job has finished, and returns the download url.
+
+    With a `store` (store.MasterStore), each job's status is saved there as
+    it changes, each file (with its data once it finishes) separately from
+    the job, so with several server processes any of them can report on a
+    job while the one that accepted it runs it. That process touches its
+    unfinished jobs every JOB_HEARTBEAT_SECONDS; if it dies, its jobs go
+    stale and are reported as failed, and are not saved over after that.
+    """
+
+    def __init__(self, extract, on_complete, concurrency, store=None):
+        self.extract = extract
+        self.on_complete = on_complete
+        self.concurrency = max(1, concurrency)
+        self.store = store
+        self.jobs = {}
+        self.queue = None
+        self.tasks = []
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.tasks = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+        if self.store is not None:
+            self.tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, files):
+        """Queues a list of (source, filename, sha256) tuples and returns the new Job."""
+        self._evict_expired()
+        job = Job(files)
+        self.jobs[job.id] = job
+        if self.store is not None:
+            self.store.put_job(job.id, job.to_dict())
+        for index in range(len(job.files)):
+            self.queue.put_nowait((job, index))
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def status(self, job_id):
+        """Returns a job's status dict, or None if it is unknown or expired."""
+        if self.store is not None:
+            status = self.store.get_job(job_id)
+            if status is not None and status["finished"] is None and self._fail_stale():
+                status = self.store.get_job(job_id)
+            return status
+        job = self.jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    async def _save_job(self, job):
+        if self.store is not None:
+            saved = await run_in_threadpool(self.store.update_job, job.id, job.to_dict(), job.finished)
+            if not saved:
+                logging.warning(f"Job {job.id} was already marked finished, not saving its status")
+
+    async def _save_file(self, job, index):
+        if self.store is not None:
+            await run_in_threadpool(self.store.update_job_file, job.id, index, job.file_dict(index))
+
+    def _fail_stale(self):
+        return self.store.fail_stale_jobs(time.time() - JOB_STALE_SECONDS, JOB_ABANDONED_ERROR)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            running = [job_id for job_id, job in self.jobs.items() if job.finished is None]
+            try:
+                await run_in_threadpool(self.store.touch_jobs, running)
+            except Exception as e:
+                logging.warning(f"Could not touch running jobs: {e}")
+
+    def _evict_expired(self):
+        now = time.time()
+        if self.store is not None:
+            self._fail_stale()
+            self.store.evict_jobs(now - JOB_TTL)
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished and now - job.finished > JOB_TTL
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def _consume(self):
+        while True:
+            job, index = await self.queue.get()
+            try:
+                await self._process_file(job, index)
+                # Decided before the next await, so only the consumer of
+                # the last file to finish runs _finish
+                last = job.pending == 0
+                await self._save_file(job, index)
+                if last:
+                    await self._finish(job)
+                    await self._save_job(job)
+            except Exception as e:
+                logging.exception(f"Job {job.id} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _process_file(self, job, index):
+        entry = job.files[index]
+
+        async def on_start():
+            entry["status"] = "processing"
+            entry["started"] = time.time()
+            if job.status == "queued":
+                job.status = "processing"
+                await self._save_job(job)
+            await self._save_file(job, index)
+
+        try:
+            data = await self.extract(entry["source"], entry["filename"], entry["sha256"], on_start=on_start)
+        except Exception as e:
+            data = None
+            entry["error"] = str(e)
+        # The upload's bytes are no longer needed once it has been extracted
+        entry["source"] = None
+        entry["finished"] = time.time()
+        if entry["started"] is not None:
+            entry["duration"] = round(entry["finished"] - entry["started"], 3)
+        if data:
+            entry["data"] = data
+            entry["status"] = "done"
+        else:
+            entry["status"] = "failed"
+            entry["error"] = entry["error"] or "No valid data extracted"
+
+    async def _finish(self, job):
+        job.status = "saving"
+        extracted_data_list = [f["data"] for f in job.files if f["data"]]
+        saved = await run_in_threadpool(self.store.get_job, job.id) if self.store is not None else None
+        if self.store is not None and (saved is None or saved["finished"] is not None):
+            # Already reported as failed (stale) or evicted, so its results
+            # are not stored behind the client's back
+            job.status = "failed"
+            job.error = saved["error"] if saved else JOB_ABANDONED_ERROR
+        elif not extracted_data_list:
+            job.status = "failed"
+            job.error = "No valid data extracted from uploaded files."
+        else:
+            try:
+                job.download_url = await run_in_threadpool(self.on_complete, job, extracted_data_list)
+                job.status = "completed"
+            except Exception as e:
+                job.status = "failed"
+                job.error = f"Could not save results: {e}"
+        job.finished = time.time()
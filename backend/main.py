@@ -1,15 +1,32 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import shutil
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+import asyncio
+import hashlib
 import os
+import re
+import time
 import uuid
-import json
-from typing import List
-import pandas as pd
+from typing import List, Optional
+
+# Settings from backend/.env must be in the environment before the modules
+# below read them at import time
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+
+import admission
+import cache
+import exporter
 import extractor
+import jobs
+import locks
+import metrics
+import store
+import workers
+from responses import CompressionMiddleware, FastJSONResponse
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # CORS configuration
 app.add_middleware(
@@ -19,102 +36,538 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 # Directories
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-UPLOAD_DIR = os.path.join(BASE_DIR, "uploads")
-OUTPUT_DIR = os.path.join(BASE_DIR, "outputs")
-DATA_DIR = os.path.join(BASE_DIR, "data")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(BASE_DIR, "uploads"))
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", os.path.join(BASE_DIR, "outputs"))
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
 MASTER_DATA_FILE = os.path.join(DATA_DIR, "master_data.json")
+MASTER_DB_FILE = os.path.join(DATA_DIR, "master_data.db")
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Uploads up to this size are parsed straight from memory; larger ones are
+# spilled to a temp file in UPLOAD_DIR, which the extractor memory-maps
+UPLOAD_MEMORY_MAX_BYTES = int(os.getenv("UPLOAD_MEMORY_MAX_BYTES", 20 * 1024 * 1024))
+
+# Master data store; records from the old master_data.json are imported once
+master_store = store.MasterStore(MASTER_DB_FILE, legacy_json_path=MASTER_DATA_FILE)
+
+# Extraction results cache, keyed by the SHA-256 of the uploaded PDF
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 50 * 1024 * 1024))
+extraction_cache = cache.ExtractionCache(CACHE_DIR, extractor.EXTRACTOR_VERSION, CACHE_MAX_BYTES)
+
+# Keep the page text and tables of each parsed PDF in the store, so
+# reextract.py can rebuild records after a rule change without the PDFs
+KEEP_INTERMEDIATES = os.getenv("KEEP_INTERMEDIATES", "true").lower() in ("1", "true", "yes")
+# Size limit of the saved intermediates (compressed); the oldest go first
+INTERMEDIATES_MAX_BYTES = int(os.getenv("INTERMEDIATES_MAX_BYTES", 200 * 1024 * 1024))
+# Intermediates whose PDF never made it into the master data (its job
+# failed, or was abandoned) are deleted once they are this old (seconds)
+ORPHANED_INTERMEDIATES_SECONDS = 24 * 3600
+
+# Skip storing a PDF whose hash is already in the master data
+DEDUPE_UPLOADS = os.getenv("DEDUPE_UPLOADS", "false").lower() in ("1", "true", "yes")
+
+# The Excel download is rebuilt from the store on demand and cached per
+# store version; this lock file stops concurrent downloads, from any server
+# process, rebuilding it twice
+EXCEL_FILENAME = "Course_Outlines.xlsx"
+EXCEL_LOCK_FILE = os.path.join(OUTPUT_DIR, ".excel.lock")
+
+# Uploads sent with an "X-Profile: 1" header are profiled with cProfile when
+# this is enabled; one .prof file per PDF is written to PROFILE_DIR
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "false").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.registry.observe(
+        "http_request_duration_seconds",
+        time.perf_counter() - start,
+        method=request.method,
+        route=route.path if route else "unmatched",
+    )
+    return response
+
+# Admission control for uploads: bounded queue of files, bounded extractions
+UPLOAD_PATHS = ("/api/upload", "/api/jobs")
+admission_controller = admission.AdmissionController(
+    admission.MAX_CONCURRENT_EXTRACTIONS, admission.MAX_QUEUED_FILES
+)
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # Refuse oversized uploads from the header, before the body is read
+    if request.method == "POST" and request.url.path in UPLOAD_PATHS:
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > admission.MAX_REQUEST_BYTES:
+            metrics.registry.inc("upload_rejections_total", reason="too_large")
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Upload exceeds {admission.MAX_REQUEST_BYTES} bytes"},
+            )
+    return await call_next(request)
+
+def admit_uploads(files):
+    """
+    Checks an upload against the request limits and reserves queue places
+    for its PDFs. Returns the number admitted; raises 413 or 429.
+    """
+    if len(files) > admission.MAX_FILES_PER_REQUEST:
+        metrics.registry.inc("upload_rejections_total", reason="too_many_files")
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {admission.MAX_FILES_PER_REQUEST} files per upload",
+        )
+    # Chunked uploads carry no Content-Length for the middleware to check
+    if sum(file.size or 0 for file in files) > admission.MAX_REQUEST_BYTES:
+        metrics.registry.inc("upload_rejections_total", reason="too_large")
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {admission.MAX_REQUEST_BYTES} bytes")
+
+    count = sum(1 for file in files if file.filename.endswith('.pdf'))
+    try:
+        admission_controller.admit(count)
+    except admission.QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many files queued for extraction, try again later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return count
+
 def load_master_data():
-    if os.path.exists(MASTER_DATA_FILE):
-        try:
-            with open(MASTER_DATA_FILE, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return []
-    return []
+    return master_store.all()
+
+def append_master_data(records, dedupe=False):
+    """Appends records to the master store, returning the ones stored."""
+    with metrics.span("store_append"):
+        return master_store.append(records, dedupe=dedupe)
+
+# Pagination limits for /api/data
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
 
-def save_master_data(data):
-    with open(MASTER_DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def data_etag(version):
+    return f'W/"{version}"'
+
+def not_modified(request, etag):
+    """Whether the request's If-None-Match already names `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"1" and "1" match
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in tags
+
+def version_headers():
+    """
+    ETag from the store version, with no-cache so clients always revalidate.
+    Read it before the records: a write in between then at worst makes the
+    next poll return a full response again.
+    """
+    return {"ETag": data_etag(master_store.version()), "Cache-Control": "no-cache"}
 
 @app.get("/api/data")
-async def get_all_data():
-    data = load_master_data()
-    return {"data": data}
+def get_all_data(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    school: Optional[str] = None,
+    semester: Optional[str] = None,
+    course: Optional[str] = None,
+    faculty: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    Returns stored records a page at a time. Pass the returned `next_cursor`
+    as `cursor` to get the next page; it is null on the last page. `seq` is
+    the sequence number of the page's last record, to poll
+    /api/data/changes with. `fields` is a comma-separated list of record
+    keys to return. Responses carry an ETag; a request whose If-None-Match
+    matches gets 304 while no records have been stored since.
+    """
+    after = None
+    if cursor:
+        if not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = int(cursor)
 
-@app.post("/api/upload")
-async def upload_files(files: List[UploadFile] = File(...)):
-    extracted_data_list = []
+    headers = version_headers()
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    filters = {
+        "School": school,
+        "Semester": semester,
+        "Course": course,
+        "Faculty Name(s)": faculty,
+    }
+    filters = {field: value for field, value in filters.items() if value}
+
+    # Fetch one extra row to learn whether another page follows
+    rows = master_store.query(filters, after=after, limit=limit + 1)
+    next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+    rows = rows[:limit]
+    data = project_fields([record for _, record in rows], fields)
+    seq = rows[-1][0] if rows else (after or 0)
+
+    return FastJSONResponse({"data": data, "next_cursor": next_cursor, "seq": seq}, headers=headers)
+
+@app.get("/api/data/changes")
+def get_data_changes(
+    request: Request,
+    since: int = Query(0, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+):
+    """
+    Returns the records stored after sequence number `since`, oldest first.
+    Poll with the returned `seq` as the next `since`; while `has_more` is
+    true, more records are waiting. Stored records only change when
+    reextract.py --apply rewrites them, which this does not report; reload
+    from /api/data after one. A `since` past the newest record (e.g. after
+    the store was reset) gets 410: reload from /api/data.
+    """
+    headers = version_headers()
+    if not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    rows = master_store.query(after=since, limit=limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows and since > master_store.latest_seq():
+        raise HTTPException(status_code=410, detail="Unknown sequence number; reload /api/data")
+    data = project_fields([record for _, record in rows], fields)
+    seq = rows[-1][0] if rows else since
+
+    return FastJSONResponse({"data": data, "seq": seq, "has_more": has_more}, headers=headers)
+
+def project_fields(data, fields):
+    """Keeps only the comma-separated `fields` of each record, if given."""
+    if not fields:
+        return data
+    keys = [key.strip() for key in fields.split(",") if key.strip()]
+    return [{key: record.get(key, "") for key in keys} for record in data]
+
+# Result limits for /api/search
+DEFAULT_SEARCH_SIZE = 20
+MAX_SEARCH_SIZE = 100
+
+@app.get("/api/search")
+def search_data(
+    q: str,
+    field: Optional[str] = None,
+    limit: int = Query(DEFAULT_SEARCH_SIZE, ge=1, le=MAX_SEARCH_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    Full-text search over course, faculty, description, material, learning
+    outcomes and session details. Returns records containing every word of
+    `q` (the last as a prefix), best match first. `field` restricts the
+    search to one of those (e.g. `material`). Pages work as in /api/data.
+    """
+    if field is not None and field not in store.SEARCH_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unknown search field: {field}")
+    offset = 0
+    if cursor:
+        if not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        offset = int(cursor)
+
+    rows = master_store.search(q, column=field, offset=offset, limit=limit + 1)
+    next_cursor = str(offset + limit) if len(rows) > limit else None
+    data = project_fields([record for _, record in rows[:limit]], fields)
+
+    return FastJSONResponse({"data": data, "next_cursor": next_cursor})
+
+def store_results(extracted_data_list):
+    # Update Master Data
+    append_master_data(extracted_data_list, dedupe=DEDUPE_UPLOADS)
+
+def store_job_results(job, extracted_data_list):
+    store_results(extracted_data_list)
+    return f"/api/download/{EXCEL_FILENAME}"
+
+def build_excel_export():
+    """
+    Returns the path of an Excel export of the master data, regenerating it
+    only when the store version has changed since it was last built.
+    """
+    version = master_store.version()
+    export_path = os.path.join(OUTPUT_DIR, f"Course_Outlines.v{version}.xlsx")
+    if os.path.exists(export_path):
+        return export_path
+
+    with locks.file_lock(EXCEL_LOCK_FILE):
+        if os.path.exists(export_path):
+            return export_path
+
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        # Build under a temporary name so a download never sees a partial file
+        tmp_path = os.path.join(OUTPUT_DIR, f"{uuid.uuid4().hex}.tmp.xlsx")
+        try:
+            extractor.write_excel(master_store.iter_all(), tmp_path, master_store.max_session())
+            os.replace(tmp_path, export_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        # Drop exports of older versions, except the one before this, which
+        # another process may have just handed to a download
+        match = re.compile(r"^Course_Outlines\.v(\d+)\.xlsx$")
+        versions = sorted(int(m.group(1)) for m in map(match.match, os.listdir(OUTPUT_DIR)) if m)
+        for old_version in versions[:-2]:
+            try:
+                os.remove(os.path.join(OUTPUT_DIR, f"Course_Outlines.v{old_version}.xlsx"))
+            except FileNotFoundError:
+                pass
+    return export_path
+
+@app.on_event("startup")
+async def start_jobs():
+    admission_controller.start()
+    job_manager.start()
+    workers.warm_up()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await job_manager.stop()
+    workers.shutdown_pool()
+
+def cached_extraction(file_hash):
+    """
+    Returns the cached result for a PDF, or None. With KEEP_INTERMEDIATES,
+    a PDF whose intermediates are missing (parsed before they were kept)
+    counts as a miss, so uploading it again saves them.
+    """
+    data = extraction_cache.get(file_hash)
+    if data is not None and KEEP_INTERMEDIATES and not master_store.has_intermediates(file_hash):
+        return None
+    return data
+
+def save_intermediates(file_hash, intermediates):
+    master_store.put_intermediates(file_hash, intermediates)
+    master_store.evict_intermediates(INTERMEDIATES_MAX_BYTES, time.time() - ORPHANED_INTERMEDIATES_SECONDS)
+
+async def extract_upload(source, filename, file_hash, profile_path=None, on_start=None):
+    """
+    Extracts one upload (bytes, or a spilled temp file path) in the worker
+    pool, removing any temp file afterwards. PDFs seen before are served
+    from the extraction cache without parsing, unless the extraction is
+    being profiled to `profile_path`.
+
+    Each call uses one place reserved by admit_uploads. The cache is looked
+    up first, so a hit gives the place back without waiting behind running
+    extractions; a miss waits for an extraction slot. `on_start`, a
+    coroutine function, is awaited when the file's processing really
+    starts: on a cache hit, or once the slot is taken.
+    """
+    queued = True
+    try:
+        data = None
+        if profile_path is None:
+            with metrics.span("cache_get"):
+                data = await run_in_threadpool(cached_extraction, file_hash)
+        if data is not None:
+            metrics.registry.inc("pdf_extractions_total", outcome="cached")
+            if on_start is not None:
+                await on_start()
+        else:
+            # slot() takes the file off the queue
+            queued = False
+            async with admission_controller.slot():
+                if on_start is not None:
+                    await on_start()
+                data = await _extract_upload(source, filename, file_hash, profile_path)
+        if data:
+            # Add filename and content hash for reference
+            data['Source File'] = filename
+            data['File Hash'] = file_hash
+        return data
+    finally:
+        if queued:
+            admission_controller.cancel(1)
+        # Clean up spilled upload file
+        if isinstance(source, str) and os.path.exists(source):
+            os.remove(source)
+
+async def _extract_upload(source, filename, file_hash, profile_path):
+    try:
+        intermediates = {}
+        data = await workers.extract_pdf(source, profile_path=profile_path, intermediates=intermediates)
+        metrics.registry.inc("pdf_extractions_total", outcome="extracted" if data else "failed")
+        if data:
+            with metrics.span("cache_put"):
+                await run_in_threadpool(extraction_cache.put, file_hash, data)
+        if data and intermediates and KEEP_INTERMEDIATES:
+            with metrics.span("intermediates_put"):
+                await run_in_threadpool(save_intermediates, file_hash, intermediates)
+        return data
+    except asyncio.TimeoutError:
+        metrics.registry.inc("pdf_extractions_total", outcome="timeout")
+        print(f"Error processing {filename}: timed out after {workers.EXTRACT_TIMEOUT}s")
+    except Exception as e:
+        metrics.registry.inc("pdf_extractions_total", outcome="failed")
+        print(f"Error processing {filename}: {e}")
+    return None
+
+def read_upload(file, chunk_size=1024 * 1024, memory_max_bytes=None):
+    """
+    Reads an uploaded file and hashes it in the same pass. Returns
+    (source, sha256) where source is the bytes, or the path of a temp file
+    in UPLOAD_DIR once the upload is larger than `memory_max_bytes`
+    (default UPLOAD_MEMORY_MAX_BYTES).
+    """
+    if memory_max_bytes is None:
+        memory_max_bytes = UPLOAD_MEMORY_MAX_BYTES
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    spill_path = None
+    spill = None
+    try:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+            size += len(chunk)
+            if spill is None and size > memory_max_bytes:
+                # Ensure directory exists (in case it was deleted while server was running)
+                os.makedirs(UPLOAD_DIR, exist_ok=True)
+                spill_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}.pdf")
+                spill = open(spill_path, "wb")
+                spill.writelines(chunks)
+                chunks = []
+            if spill is not None:
+                spill.write(chunk)
+            else:
+                chunks.append(chunk)
+    finally:
+        if spill is not None:
+            spill.close()
+
+    source = spill_path if spill_path else b"".join(chunks)
+    return source, digest.hexdigest()
+
+def save_uploads(files, memory_max_bytes=None):
+    """Reads uploaded PDFs, returning (source, filename, sha256) tuples."""
+    saved_files = []
     
     for file in files:
         if not file.filename.endswith('.pdf'):
             continue
             
-        # Save file temporarily
-        file_id = str(uuid.uuid4())
-        file_ext = os.path.splitext(file.filename)[1]
-        file_path = os.path.join(UPLOAD_DIR, f"{file_id}{file_ext}")
-        
-        # Ensure directory exists (in case it was deleted while server was running)
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Extract data
-        try:
-            data = extractor.extract_data_from_pdf(file_path)
-            if data:
-                # Add filename for reference
-                data['Source File'] = file.filename
-                # Add timestamp or upload ID if needed, but keeping it simple
-                extracted_data_list.append(data)
-        except Exception as e:
-            print(f"Error processing {file.filename}: {e}")
-        finally:
-            # Clean up uploaded file
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        source, file_hash = read_upload(file.file, memory_max_bytes=memory_max_bytes)
+        saved_files.append((source, file.filename, file_hash))
+    return saved_files
+
+async def read_admitted_uploads(files, memory_max_bytes=None):
+    """
+    admit_uploads, then save_uploads in a thread, since reading and hashing
+    the uploads would block the event loop. Each returned file must be
+    extracted.
+    """
+    count = admit_uploads(files)
+    try:
+        return await run_in_threadpool(save_uploads, files, memory_max_bytes)
+    except BaseException:
+        # Also when the request is cancelled, or the places are never freed
+        admission_controller.cancel(count)
+        raise
+
+# A consumer per admissible file, so every queued file waits in the
+# admission controller, which alone limits the extractions running
+job_manager = jobs.JobManager(extract_upload, store_job_results, admission.MAX_QUEUED_FILES, store=master_store)
+
+def profile_paths(request, response, saved_files):
+    """
+    Returns a .prof path per upload when the request asks to be profiled,
+    else Nones. The profile id is returned in the X-Profile-Id header.
+    """
+    if not (PROFILE_REQUESTS and request.headers.get("X-Profile")):
+        return [None] * len(saved_files)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+    response.headers["X-Profile-Id"] = profile_id
+    return [
+        os.path.join(PROFILE_DIR, f"{profile_id}-{i}-{re.sub(r'[^A-Za-z0-9._-]', '_', filename)}.prof")
+        for i, (_, filename, _) in enumerate(saved_files)
+    ]
+
+def fill_missing_fields(records):
+    """
+    Gives every record the union of all records' keys, in first-seen order,
+    with missing or None values as "" (so the frontend table lines up).
+    """
+    keys = list(dict.fromkeys(key for record in records for key in record))
+    return [
+        {key: "" if record.get(key) is None else record[key] for key in keys}
+        for record in records
+    ]
+
+@app.post("/api/upload")
+async def upload_files(request: Request, response: Response, files: List[UploadFile] = File(...)):
+    saved_files = await read_admitted_uploads(files)
+    profiles = profile_paths(request, response, saved_files)
+
+    # Extract data in the worker pool, all files concurrently
+    results = await asyncio.gather(*(
+        extract_upload(*saved, profile_path=profile)
+        for saved, profile in zip(saved_files, profiles)
+    ))
+    extracted_data_list = [data for data in results if data]
 
     if not extracted_data_list:
         raise HTTPException(status_code=400, detail="No valid data extracted from uploaded files.")
 
-    # Update Master Data
-    os.makedirs(DATA_DIR, exist_ok=True)
-    current_master_data = load_master_data()
-    current_master_data.extend(extracted_data_list)
-    save_master_data(current_master_data)
-
-    # Append to the main Excel file
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    output_filename = "Course_Outlines.xlsx"
-    output_path = os.path.join(OUTPUT_DIR, output_filename)
-    
-    extractor.append_to_excel(extracted_data_list, output_path)
-    
-    # Convert to JSON for frontend display
-    df = pd.DataFrame(extracted_data_list)
-    df = df.fillna("")
-    json_data = df.to_dict(orient="records")
+    # Persist results off the event loop
+    await run_in_threadpool(store_results, extracted_data_list)
     
     return {
         "message": "Extraction complete",
-        "data": json_data,
-        "download_url": f"/api/download/{output_filename}"
+        "data": fill_missing_fields(extracted_data_list),
+        "download_url": f"/api/download/{EXCEL_FILENAME}"
     }
 
+@app.post("/api/jobs", status_code=202)
+async def create_job(files: List[UploadFile] = File(...)):
+    # Job files can wait in the queue for a long time, up to
+    # MAX_QUEUED_FILES of them, so they wait on disk rather than in memory
+    saved_files = await read_admitted_uploads(files, memory_max_bytes=0)
+    if not saved_files:
+        raise HTTPException(status_code=400, detail="No PDF files uploaded.")
+
+    job = job_manager.submit(saved_files)
+    return {"job_id": job.id, "status_url": f"/api/jobs/{job.id}"}
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    # From the store, so any server process can answer
+    status = job_manager.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@app.get("/api/metrics")
+def get_metrics():
+    """Stage timings, request durations and extraction counts in Prometheus text format."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/download/{filename}")
-async def download_file(filename: str):
-    file_path = os.path.join(OUTPUT_DIR, filename)
-    if not os.path.exists(file_path):
+def download_file(filename: str):
+    if filename != EXCEL_FILENAME:
         raise HTTPException(status_code=404, detail="File not found")
+    file_path = build_excel_export()
     
     return FileResponse(
         path=file_path, 
@@ -122,13 +575,31 @@ async def download_file(filename: str):
         media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
 
+@app.get("/api/export")
+def export_data(format: str = "csv"):
+    """
+    Streams every stored record as CSV, JSON Lines or Parquet, with the
+    same columns as the Excel download.
+    """
+    if format not in exporter.EXPORTERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+    columns = extractor.export_columns(master_store.max_session())
+    rows = exporter.EXPORTERS[format](master_store.iter_all(), columns)
+    return StreamingResponse(
+        rows,
+        media_type=exporter.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="Course_Outlines.{format}"'},
+    )
+
 if __name__ == "__main__":
     import uvicorn
-    from dotenv import load_dotenv
-    
-    load_dotenv()
     
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
     
-    uvicorn.run(app, host=host, port=port)
+    if workers.WEB_CONCURRENCY > 1:
+        # Each server process imports the app itself
+        uvicorn.run("main:app", host=host, port=port, workers=workers.WEB_CONCURRENCY)
+    else:
+        uvicorn.run(app, host=host, port=port)
@@ -0,0 +1,160 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels, extra=None):
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in items
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class Registry:
+    """
+    Thread-safe set of named histograms, counters and gauges, rendered in
+    the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.help = {}
+        self.types = {}
+        self.histograms = {}
+        # Current counter and gauge values
+        self.values = {}
+
+    def describe(self, name, kind, text):
+        self.help[name] = text
+        self.types[name] = kind
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        """Sets a gauge."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = value
+
+    def render(self):
+        lines = []
+        with self.lock:
+            names = sorted({name for name, _ in self.histograms} | {name for name, _ in self.values})
+            for name in names:
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                    lines.append(f"# TYPE {name} {self.types[name]}")
+                for (metric, labels), value in sorted(self.values.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+                for (metric, labels), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_labels(labels, {'le': float(bound)})} {count}")
+                    lines.append(f"{name}_bucket{_labels(labels, {'le': '+Inf'})} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+registry.describe("pdf_stage_seconds", "histogram", "Seconds spent in each extraction and storage stage.")
+registry.describe("http_request_duration_seconds", "histogram", "Seconds spent handling HTTP requests.")
+registry.describe("pdf_extractions_total", "counter", "PDFs processed, by outcome.")
+registry.describe("extraction_queue_depth", "gauge", "Admitted PDFs waiting for an extraction slot.")
+registry.describe("extractions_running", "gauge", "PDFs being extracted.")
+registry.describe("extraction_queue_wait_seconds", "histogram", "Seconds a PDF waited for an extraction slot.")
+registry.describe("upload_rejections_total", "counter", "Upload requests refused by admission control, by reason.")
+
+_local = threading.local()
+
+
+def observe_stage(stage, seconds):
+    """
+    Records `seconds` spent in `stage`. Inside capture() the observation is
+    collected for the caller to hand back to the main process instead.
+    """
+    captured = getattr(_local, "captured", None)
+    if captured is not None:
+        captured.append((stage, seconds))
+    else:
+        registry.observe("pdf_stage_seconds", seconds, stage=stage)
+
+
+@contextmanager
+def span(stage):
+    """Times the enclosed block as one observation of `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def observe_pages(page_timings):
+    """Records the per-page timings collected by extractor.iter_pages."""
+    for timing in page_timings:
+        if timing.get("backend", "pdfplumber") == "pdfplumber":
+            observe_stage("pdf_text", timing["text"])
+        else:
+            observe_stage(f"pdf_text_{timing['backend']}", timing["text"])
+        if timing["tables"] is not None:
+            observe_stage("pdf_tables", timing["tables"])
+
+
+@contextmanager
+def capture():
+    """
+    Collects the stage observations made by this thread into a list of
+    (stage, seconds) pairs instead of recording them. Used in worker
+    processes, whose own registry is never scraped; pass the list to
+    record() in the main process.
+    """
+    previous = getattr(_local, "captured", None)
+    _local.captured = []
+    try:
+        yield _local.captured
+    finally:
+        _local.captured = previous
+
+
+def record(spans):
+    """Records observations collected by capture()."""
+    for stage, seconds in spans:
+        observe_stage(stage, seconds)
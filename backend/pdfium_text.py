@@ -0,0 +1,125 @@
+"""
+Fast page text via pdfium (pypdfium2), laid out like pdfplumber's.
+
+pdfplumber gets its characters from pdfminer's pure-Python content stream
+interpreter, which is most of its cost. Here the characters and their
+boxes come from pdfium instead, shaped like pdfminer's (the box spans the
+advance width, and is one font size tall above the descent), and are then
+put into lines and words by pdfplumber's own extract_text, so the text
+normally comes out the same.
+
+pdfium replaces space glyphs that are separate text objects with spaces
+of its own, which it also generates for gaps that had no space glyph.
+pdfplumber only breaks words at real space glyphs and at gaps wider than
+its tolerance, so a generated space is kept only when a blank text object
+was drawn there, and other gaps are left to extract_text.
+"""
+import ctypes
+import os
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from pdfplumber.utils.text import extract_text
+
+# Characters pdfium inserts at line ends
+_LINE_BREAKS = {"\r", "\n"}
+
+
+def open_document(source):
+    """Opens a path, bytes or binary file object with pdfium."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pdfium.PdfDocument(bytes(source))
+    if isinstance(source, (str, os.PathLike)):
+        return pdfium.PdfDocument(os.fspath(source))
+    # pdfium reads a file object lazily, which would interleave with
+    # pdfplumber reading the same object for tables, so take a copy
+    source.seek(0)
+    return pdfium.PdfDocument(source.read())
+
+
+def _address(obj):
+    return ctypes.cast(obj, ctypes.c_void_p).value
+
+
+def _object_text(obj, textpage):
+    length = pdfium_c.FPDFTextObj_GetText(obj, textpage, None, 0)
+    buffer = ctypes.create_string_buffer(length)
+    pdfium_c.FPDFTextObj_GetText(obj, textpage, ctypes.cast(buffer, ctypes.POINTER(pdfium_c.FPDF_WCHAR)), length)
+    return buffer.raw.decode("utf-16-le").rstrip("\x00")
+
+
+class _TextObjects:
+    """Content-order index of a page's text objects, and which are blank."""
+
+    def __init__(self, page, textpage):
+        self.index = {}
+        self.blank = []
+        for i in range(pdfium_c.FPDFPage_CountObjects(page)):
+            obj = pdfium_c.FPDFPage_GetObject(page, i)
+            if pdfium_c.FPDFPageObj_GetType(obj) != pdfium_c.FPDF_PAGEOBJ_TEXT:
+                continue
+            self.index[_address(obj)] = len(self.blank)
+            self.blank.append(not _object_text(obj, textpage).strip())
+
+    def blank_between(self, first, second):
+        start = self.index.get(first)
+        end = self.index.get(second)
+        if start is None or end is None:
+            return False
+        return any(self.blank[start + 1:end])
+
+
+def page_chars(page):
+    """Returns the page's characters as pdfplumber-style dicts."""
+    textpage = page.get_textpage()
+    try:
+        height = page.get_height()
+        count = pdfium_c.FPDFText_CountChars(textpage)
+        rect = pdfium_c.FS_RECTF()
+        objects = None
+        chars = []
+        last_object = None
+        for i in range(count):
+            text = chr(pdfium_c.FPDFText_GetUnicode(textpage, i))
+            if text in _LINE_BREAKS or text == "\x00":
+                continue
+            if pdfium_c.FPDFText_IsGenerated(textpage, i):
+                if text != " " or last_object is None or i + 1 >= count:
+                    continue
+                next_object = pdfium_c.FPDFText_GetTextObject(textpage, i + 1)
+                if not next_object:
+                    continue
+                if objects is None:
+                    objects = _TextObjects(page.raw, textpage)
+                if not objects.blank_between(last_object, _address(next_object)):
+                    continue
+            else:
+                obj = pdfium_c.FPDFText_GetTextObject(textpage, i)
+                last_object = _address(obj) if obj else None
+
+            pdfium_c.FPDFText_GetLooseCharBox(textpage, i, rect)
+            if rect.right <= rect.left and chars:
+                # Spaces come back with an empty box; place them after the
+                # previous character on its line
+                previous = chars[-1]
+                chars.append(dict(previous, text=text, x0=previous["x1"]))
+                continue
+            size = pdfium_c.FPDFText_GetFontSize(textpage, i)
+            bottom = height - rect.bottom
+            chars.append({
+                "text": text,
+                "x0": rect.left,
+                "x1": rect.right,
+                "top": bottom - size,
+                "bottom": bottom,
+                "doctop": bottom - size,
+                "upright": True,
+            })
+        return chars
+    finally:
+        textpage.close()
+
+
+def page_text(page):
+    """Text of a pdfium page, as pdfplumber's page.extract_text() lays it out."""
+    return extract_text(page_chars(page))
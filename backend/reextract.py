@@ -0,0 +1,122 @@
+"""
+Re-extraction CLI.
+
+Rebuilds every stored record from the page text and tables saved when its
+PDF was parsed (see KEEP_INTERMEDIATES), running only the field stage of
+the extractor: no PDF is opened. After a change to the field rules (field
+markers, block headers, the Course Material split, session table mapping)
+this reports which records the new rules change and, with --apply, writes
+them back.
+
+Records parsed before intermediates were kept, and records whose session
+table the new rules would read from pages that were never analysed for
+tables, are listed as needing a re-upload instead.
+
+Bump extractor.EXTRACTOR_VERSION along with the rule change, so PDFs
+uploaded again are not served from the extraction cache.
+
+Usage:
+    python reextract.py [--db PATH] [--apply] [--verbose]
+"""
+import argparse
+import os
+import sys
+
+import extractor
+import store
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
+
+# Keys an upload adds to the extracted record, carried over as they are
+UPLOAD_FIELDS = ["Source File", "File Hash"]
+
+BATCH_SIZE = 500
+
+
+def reextract(record, intermediates):
+    """Returns (new_record, missing_pages) for a stored record."""
+    new, missing_pages = extractor.record_from_intermediates(intermediates)
+    for field in UPLOAD_FIELDS:
+        if field in record:
+            new[field] = record[field]
+    return new, missing_pages
+
+
+def changed_fields(old, new):
+    return [key for key in dict.fromkeys([*old, *new]) if old.get(key) != new.get(key)]
+
+
+def _preview(value, width=80):
+    text = str(value if value is not None else "").replace("\n", " | ")
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+def run(master_store, apply=False, verbose=False):
+    """Re-extracts every record and returns counts by outcome."""
+    counts = {"checked": 0, "changed": 0, "unchanged": 0, "no_intermediates": 0, "needs_pdf": 0}
+    after = 0
+    while True:
+        rows = master_store.query(after=after, limit=BATCH_SIZE)
+        if not rows:
+            break
+        after = rows[-1][0]
+
+        changes = []
+        for seq, record in rows:
+            counts["checked"] += 1
+            label = f"#{seq} {record.get('Source File') or record.get('Course') or ''}".rstrip()
+            file_hash = record.get("File Hash")
+            intermediates = master_store.get_intermediates(file_hash) if file_hash else None
+            if intermediates is None:
+                counts["no_intermediates"] += 1
+                if verbose:
+                    print(f"{label}: no saved intermediates, re-upload the PDF to update it")
+                continue
+
+            new, missing_pages = reextract(record, intermediates)
+            if missing_pages:
+                counts["needs_pdf"] += 1
+                pages = ", ".join(str(index + 1) for index in missing_pages)
+                print(f"{label}: session table rules now read page(s) {pages}, which were not analysed; re-upload the PDF")
+                continue
+
+            fields = changed_fields(record, new)
+            if not fields:
+                counts["unchanged"] += 1
+                continue
+            counts["changed"] += 1
+            print(f"{label}: {', '.join(fields)}")
+            if verbose:
+                for field in fields:
+                    print(f"    {field}")
+                    print(f"      old: {_preview(record.get(field))}")
+                    print(f"      new: {_preview(new.get(field))}")
+            changes.append((seq, record, new))
+
+        if apply:
+            master_store.replace_records(changes)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=os.path.join(DATA_DIR, "master_data.db"), help="master data database")
+    parser.add_argument("--apply", action="store_true", help="write the changed records back")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show old and new values of changed fields")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        sys.exit(f"No database at {args.db}")
+    counts = run(store.MasterStore(args.db), apply=args.apply, verbose=args.verbose)
+
+    print(
+        f"\n{counts['checked']} records: {counts['changed']} changed, {counts['unchanged']} unchanged, "
+        f"{counts['no_intermediates']} without intermediates, {counts['needs_pdf']} need the PDF"
+    )
+    if counts["changed"]:
+        print("Changes written." if args.apply else "Run with --apply to write the changes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,553 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+import re
+import zlib
+
+import extractor
+
+# Records are decoded on every read; orjson does it about twice as fast
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+# Record fields copied into their own indexed columns so they can be filtered
+# without decoding every record
+FILTER_COLUMNS = {
+    "School": "school",
+    "Semester": "semester",
+    "Course": "course",
+    "Faculty Name(s)": "faculty",
+}
+
+# Record fields in the full-text search index, by index column. "sessions"
+# holds the text of every session row.
+SEARCH_COLUMNS = {
+    "course": "Course",
+    "faculty": "Faculty Name(s)",
+    "description": "Course Description",
+    "material": "Course Material",
+    "outcomes": "Learning Outcomes",
+    "sessions": "Sessions",
+}
+
+
+def search_query(text, column=None):
+    """
+    Turns free text into an FTS5 query matching records containing every
+    word, the last one as a prefix (so results follow as the user types).
+    Returns None if there are no words. `column` limits the match to one
+    SEARCH_COLUMNS column.
+    """
+    terms = [f'"{term}"' for term in re.findall(r"\w+", text)]
+    if not terms:
+        return None
+    terms[-1] += "*"
+    query = " ".join(terms)
+    if column:
+        query = f"{{{column}}} : ({query})"
+    return query
+
+
+class MasterStore:
+    """
+    SQLite-backed store for extracted course outline records.
+
+    Each record is one row holding its JSON, so an upload inserts only the
+    new batch instead of rewriting the whole history. The database runs in
+    WAL mode: readers are never blocked by a writer, and writers from
+    several threads or processes are serialised by SQLite's own locking.
+    It also holds background job status, so every server process can
+    answer for a job another one is running, and the page text and tables
+    each PDF was parsed into, for re-extraction (see reextract.py).
+    """
+
+    def __init__(self, db_path, legacy_json_path=None):
+        self.db_path = db_path
+        self.legacy_json_path = legacy_json_path
+        self.local = threading.local()
+        self._migrate()
+
+    def connect(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _migrate(self):
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS records (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        file_hash TEXT,
+                        created REAL NOT NULL,
+                        data TEXT NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_records_file_hash ON records(file_hash)")
+                self._import_legacy_json(conn)
+                conn.execute("PRAGMA user_version = 1")
+            if version < 2:
+                for column in FILTER_COLUMNS.values():
+                    conn.execute(f"ALTER TABLE records ADD COLUMN {column} TEXT")
+                    conn.execute(f"CREATE INDEX idx_records_{column} ON records({column} COLLATE NOCASE, seq)")
+                self._backfill_filter_columns(conn)
+                conn.execute("PRAGMA user_version = 2")
+            if version < 3:
+                # Version counter bumped by every write, for export caching
+                conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                conn.execute("INSERT INTO meta (key, value) VALUES ('version', 1)")
+                conn.execute("ALTER TABLE records ADD COLUMN max_session INTEGER")
+                rows = conn.execute("SELECT seq, data FROM records").fetchall()
+                conn.executemany(
+                    "UPDATE records SET max_session = ? WHERE seq = ?",
+                    [(json.loads(data).get("Max_Session"), seq) for seq, data in rows],
+                )
+                conn.execute("PRAGMA user_version = 3")
+            if version < 4:
+                # Sessions are stored as rows instead of "Session N" text keys
+                rows = conn.execute("SELECT seq, data FROM records").fetchall()
+                conn.executemany(
+                    "UPDATE records SET data = ? WHERE seq = ?",
+                    [(json.dumps(extractor.structure_sessions(json.loads(data))), seq) for seq, data in rows],
+                )
+                conn.execute("PRAGMA user_version = 4")
+            if version < 5:
+                # Contentless full-text index keyed by records.seq; the text
+                # itself stays in records.data
+                columns = ", ".join(SEARCH_COLUMNS)
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE records_fts USING fts5({columns}, content='', "
+                    "tokenize='porter unicode61 remove_diacritics 2')"
+                )
+                for seq, data in conn.execute("SELECT seq, data FROM records").fetchall():
+                    self._index(conn, seq, json.loads(data))
+                conn.execute("PRAGMA user_version = 5")
+            if version < 6:
+                # Background job status, readable by every server process
+                conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, finished REAL, data TEXT NOT NULL)")
+                conn.execute("PRAGMA user_version = 6")
+            if version < 7:
+                # What parsing each PDF produced (page text and tables), by
+                # content hash, so records can be rebuilt without the PDF
+                conn.execute(
+                    "CREATE TABLE intermediates (file_hash TEXT PRIMARY KEY, created REAL NOT NULL, data BLOB NOT NULL)"
+                )
+                conn.execute("PRAGMA user_version = 7")
+            if version < 8:
+                # Last time the owning process saved or touched a job; jobs
+                # saved before this count as abandoned
+                conn.execute("ALTER TABLE jobs ADD COLUMN updated REAL NOT NULL DEFAULT 0")
+                conn.execute("PRAGMA user_version = 8")
+            if version < 9:
+                # Each job file's status and data in its own row, so a file
+                # finishing rewrites only that file
+                conn.execute(
+                    "CREATE TABLE job_files (job_id TEXT NOT NULL, idx INTEGER NOT NULL, data TEXT NOT NULL, "
+                    "PRIMARY KEY (job_id, idx))"
+                )
+                for job_id, data in conn.execute("SELECT id, data FROM jobs").fetchall():
+                    status = json.loads(data)
+                    files = status.pop("files", [])
+                    conn.executemany(
+                        "INSERT INTO job_files (job_id, idx, data) VALUES (?, ?, ?)",
+                        [(job_id, idx, json.dumps(entry)) for idx, entry in enumerate(files)],
+                    )
+                    conn.execute("UPDATE jobs SET data = ? WHERE id = ?", (json.dumps(status), job_id))
+                conn.execute("PRAGMA user_version = 9")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _import_legacy_json(self, conn):
+        """Copies records from the old master_data.json into a new database."""
+        if not self.legacy_json_path or not os.path.exists(self.legacy_json_path):
+            return
+        try:
+            with open(self.legacy_json_path, "r") as f:
+                records = json.load(f)
+        except json.JSONDecodeError:
+            logging.warning(f"Skipping unreadable {self.legacy_json_path}")
+            return
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO records (file_hash, created, data) VALUES (?, ?, ?)",
+            [(r.get("File Hash"), now, json.dumps(r)) for r in records],
+        )
+        logging.info(f"Imported {len(records)} records from {self.legacy_json_path}")
+
+    def _backfill_filter_columns(self, conn):
+        rows = conn.execute("SELECT seq, data FROM records").fetchall()
+        assignments = ", ".join(f"{column} = ?" for column in FILTER_COLUMNS.values())
+        conn.executemany(
+            f"UPDATE records SET {assignments} WHERE seq = ?",
+            [(*self._filter_values(json.loads(data)), seq) for seq, data in rows],
+        )
+
+    def _filter_values(self, record):
+        return [record.get(field) or None for field in FILTER_COLUMNS]
+
+    def _search_values(self, record):
+        values = []
+        for field in SEARCH_COLUMNS.values():
+            if field == "Sessions":
+                values.append("\n".join(
+                    " ".join(str(value) for value in session[1:] if value)
+                    for session in record.get("Sessions") or []
+                ))
+            else:
+                values.append(record.get(field) or "")
+        return values
+
+    def _index(self, conn, seq, record):
+        """Adds a record to the search index."""
+        columns = ", ".join(SEARCH_COLUMNS)
+        placeholders = ", ".join("?" for _ in SEARCH_COLUMNS)
+        conn.execute(
+            f"INSERT INTO records_fts (rowid, {columns}) VALUES (?, {placeholders})",
+            (seq, *self._search_values(record)),
+        )
+
+    def _unindex(self, conn, seq, record):
+        """Removes a record from the search index; needs the values it was indexed with."""
+        columns = ", ".join(SEARCH_COLUMNS)
+        placeholders = ", ".join("?" for _ in SEARCH_COLUMNS)
+        conn.execute(
+            f"INSERT INTO records_fts (records_fts, rowid, {columns}) VALUES ('delete', ?, {placeholders})",
+            (seq, *self._search_values(record)),
+        )
+
+    def _insert(self, conn, records):
+        now = time.time()
+        columns = ", ".join(FILTER_COLUMNS.values())
+        placeholders = ", ".join("?" for _ in FILTER_COLUMNS)
+        sql = f"INSERT INTO records (file_hash, created, data, max_session, {columns}) VALUES (?, ?, ?, ?, {placeholders})"
+        for r in records:
+            cursor = conn.execute(
+                sql, (r.get("File Hash"), now, json.dumps(r), r.get("Max_Session"), *self._filter_values(r))
+            )
+            # Indexed in the same transaction, so search never misses a record
+            self._index(conn, cursor.lastrowid, r)
+        if records:
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def append(self, records, dedupe=False):
+        """
+        Appends records in one transaction and returns the ones stored.
+        With `dedupe`, records whose 'File Hash' is already stored (or
+        repeated within `records`) are skipped.
+        """
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if dedupe:
+                records = self._dedupe(conn, records)
+            self._insert(conn, records)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return records
+
+    def _dedupe(self, conn, records):
+        seen = set()
+        unique = []
+        for record in records:
+            file_hash = record.get("File Hash")
+            if file_hash:
+                if file_hash in seen:
+                    continue
+                row = conn.execute("SELECT 1 FROM records WHERE file_hash = ? LIMIT 1", (file_hash,)).fetchone()
+                if row:
+                    continue
+                seen.add(file_hash)
+            unique.append(record)
+        return unique
+
+    def all(self):
+        """Returns every record in insertion order."""
+        return list(self.iter_all())
+
+    def iter_all(self, batch_size=500):
+        """
+        Yields every record in insertion order without loading them all at
+        once. Each batch is a separate query, so the generator may be
+        resumed from a different thread (as StreamingResponse does).
+        """
+        after = 0
+        while True:
+            rows = self.query(after=after, limit=batch_size)
+            if not rows:
+                return
+            for _, record in rows:
+                yield record
+            after = rows[-1][0]
+
+    def version(self):
+        """Returns a counter that changes whenever the stored records change."""
+        return self.connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def latest_seq(self):
+        """Returns the seq of the newest record, or 0 if there are none."""
+        return self.connect().execute("SELECT COALESCE(MAX(seq), 0) FROM records").fetchone()[0]
+
+    def max_session(self):
+        """Returns the highest session number across all records."""
+        return self.connect().execute("SELECT COALESCE(MAX(max_session), 0) FROM records").fetchone()[0]
+
+    def query(self, filters=None, after=None, limit=None):
+        """
+        Returns (seq, record) pairs in insertion order.
+
+        `filters` maps fields in FILTER_COLUMNS to values matched exactly,
+        ignoring case. `after` is the seq of the last record already seen,
+        and `limit` caps the number of records returned.
+        """
+        clauses = []
+        params = []
+        for field, value in (filters or {}).items():
+            clauses.append(f"{FILTER_COLUMNS[field]} = ? COLLATE NOCASE")
+            params.append(value)
+        if after is not None:
+            clauses.append("seq > ?")
+            params.append(after)
+
+        sql = "SELECT seq, data FROM records"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self.connect().execute(sql, params)
+        return [(seq, _loads(data)) for seq, data in rows]
+
+    def search(self, text, column=None, offset=0, limit=20):
+        """
+        Returns (seq, record) pairs matching `text` (see search_query), best
+        match first.
+        """
+        query = search_query(text, column)
+        if query is None:
+            return []
+        rows = self.connect().execute(
+            "SELECT records.seq, records.data FROM records_fts "
+            "JOIN records ON records.seq = records_fts.rowid "
+            "WHERE records_fts MATCH ? ORDER BY records_fts.rank LIMIT ? OFFSET ?",
+            (query, limit, offset),
+        )
+        return [(seq, _loads(data)) for seq, data in rows]
+
+    def replace_records(self, changes):
+        """
+        Replaces stored records in one transaction. `changes` is a list of
+        (seq, old_record, new_record); the old record is needed to take it
+        out of the search index. Records keep their seq, so clients
+        following /api/data/changes must reload after this.
+        """
+        if not changes:
+            return
+        conn = self.connect()
+        assignments = ", ".join(f"{column} = ?" for column in FILTER_COLUMNS.values())
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for seq, old, new in changes:
+                conn.execute(
+                    f"UPDATE records SET data = ?, max_session = ?, {assignments} WHERE seq = ?",
+                    (json.dumps(new), new.get("Max_Session"), *self._filter_values(new), seq),
+                )
+                self._unindex(conn, seq, old)
+                self._index(conn, seq, new)
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def put_intermediates(self, file_hash, intermediates):
+        """Saves what parsing a PDF produced (see extractor.record_from_intermediates)."""
+        data = zlib.compress(json.dumps(intermediates).encode("utf-8"))
+        self.connect().execute(
+            "INSERT OR REPLACE INTO intermediates (file_hash, created, data) VALUES (?, ?, ?)",
+            (file_hash, time.time(), data),
+        )
+
+    def evict_intermediates(self, max_bytes, orphaned_before):
+        """
+        Deletes intermediates saved before `orphaned_before` that no stored
+        record has the hash of, then the oldest until the rest take at most
+        `max_bytes` (no limit if 0). Returns how many were deleted.
+        """
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = conn.execute(
+                "DELETE FROM intermediates WHERE created < ? AND NOT EXISTS "
+                "(SELECT 1 FROM records WHERE records.file_hash = intermediates.file_hash)",
+                (orphaned_before,),
+            ).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(length(data)), 0) FROM intermediates").fetchone()[0]
+            if max_bytes > 0 and total > max_bytes:
+                evicted = []
+                for file_hash, size in conn.execute(
+                    "SELECT file_hash, length(data) FROM intermediates ORDER BY created"
+                ).fetchall():
+                    if total <= max_bytes:
+                        break
+                    evicted.append((file_hash,))
+                    total -= size
+                conn.executemany("DELETE FROM intermediates WHERE file_hash = ?", evicted)
+                deleted += len(evicted)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return deleted
+
+    def has_intermediates(self, file_hash):
+        row = self.connect().execute(
+            "SELECT 1 FROM intermediates WHERE file_hash = ?", (file_hash,)
+        ).fetchone()
+        return row is not None
+
+    def get_intermediates(self, file_hash):
+        """Returns the intermediates saved for a PDF's content hash, or None."""
+        row = self.connect().execute(
+            "SELECT data FROM intermediates WHERE file_hash = ?", (file_hash,)
+        ).fetchone()
+        return _loads(zlib.decompress(row[0])) if row else None
+
+    def put_job(self, job_id, status):
+        """Saves a new job's status dict; its "files" go into their own rows."""
+        status = dict(status)
+        files = status.pop("files", [])
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, finished, updated, data) VALUES (?, NULL, ?, ?)",
+                (job_id, time.time(), json.dumps(status)),
+            )
+            conn.executemany(
+                "INSERT INTO job_files (job_id, idx, data) VALUES (?, ?, ?)",
+                [(job_id, idx, json.dumps(entry)) for idx, entry in enumerate(files)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def update_job(self, job_id, status, finished=None):
+        """
+        Saves a job's own fields (the status dict without "files"), unless
+        the job has already finished, e.g. was failed as stale. Returns
+        whether it was saved.
+        """
+        status = {key: value for key, value in status.items() if key != "files"}
+        cursor = self.connect().execute(
+            "UPDATE jobs SET finished = ?, updated = ?, data = ? WHERE id = ? AND finished IS NULL",
+            (finished, time.time(), json.dumps(status), job_id),
+        )
+        return cursor.rowcount > 0
+
+    def update_job_file(self, job_id, index, entry):
+        """Saves one file of an unfinished job. Returns whether it was saved."""
+        conn = self.connect()
+        cursor = conn.execute(
+            "UPDATE job_files SET data = ? WHERE job_id = ? AND idx = ? "
+            "AND EXISTS (SELECT 1 FROM jobs WHERE id = ? AND finished IS NULL)",
+            (json.dumps(entry), job_id, index, job_id),
+        )
+        return cursor.rowcount > 0
+
+    def touch_jobs(self, job_ids):
+        """Marks running jobs as still owned by a live process."""
+        if job_ids:
+            self.connect().executemany(
+                "UPDATE jobs SET updated = ? WHERE id = ?", [(time.time(), job_id) for job_id in job_ids]
+            )
+
+    def fail_stale_jobs(self, updated_before, error):
+        """
+        Marks unfinished jobs not saved or touched since `updated_before` as
+        failed, along with their unfinished files. Returns how many.
+        """
+        conn = self.connect()
+        rows = conn.execute(
+            "SELECT id, data FROM jobs WHERE finished IS NULL AND updated < ?", (updated_before,)
+        ).fetchall()
+        now = time.time()
+        failed = 0
+        for job_id, data in rows:
+            status = _loads(data)
+            status.update(status="failed", error=error, finished=now)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.execute(
+                    "UPDATE jobs SET finished = ?, data = ? WHERE id = ? AND finished IS NULL AND updated < ?",
+                    (now, json.dumps(status), job_id, updated_before),
+                )
+                if cursor.rowcount:
+                    failed += 1
+                    files = conn.execute("SELECT idx, data FROM job_files WHERE job_id = ?", (job_id,)).fetchall()
+                    for idx, file_data in files:
+                        entry = _loads(file_data)
+                        if entry["status"] in ("queued", "processing"):
+                            entry.update(status="failed", error=error)
+                            conn.execute(
+                                "UPDATE job_files SET data = ? WHERE job_id = ? AND idx = ?",
+                                (json.dumps(entry), job_id, idx),
+                            )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return failed
+
+    def get_job(self, job_id):
+        """Returns a job's last saved status dict, with its files, or None."""
+        conn = self.connect()
+        row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        status = _loads(row[0])
+        files = [
+            _loads(data)
+            for (data,) in conn.execute("SELECT data FROM job_files WHERE job_id = ? ORDER BY idx", (job_id,))
+        ]
+        # Counts follow the file rows, which are saved separately
+        status["total"] = len(files)
+        status["completed"] = sum(1 for entry in files if entry["status"] not in ("queued", "processing"))
+        status["files"] = files
+        return status
+
+    def evict_jobs(self, finished_before):
+        """Deletes jobs that finished before the given time."""
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM job_files WHERE job_id IN (SELECT id FROM jobs WHERE finished < ?)", (finished_before,)
+            )
+            conn.execute("DELETE FROM jobs WHERE finished < ?", (finished_before,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def count(self):
+        return self.connect().execute("SELECT COUNT(*) FROM records").fetchone()[0]
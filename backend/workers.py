@@ -0,0 +1,186 @@
+import asyncio
+import cProfile
+import os
+import logging
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import extractor
+import metrics
+
+# Server processes (uvicorn/gunicorn workers); each has its own pool, so by
+# default they split the CPUs between them
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+
+# Default cap on workers per server process; each holds the PDF libraries
+# (about 40 MB) once it has run an extraction
+MAX_DEFAULT_WORKERS = 4
+
+
+def available_cpus():
+    """
+    CPUs this process may use: its CPU affinity, further limited by a
+    cgroup v2 CPU quota such as a container platform sets.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+# Worker pool configuration
+EXTRACT_WORKERS = int(os.getenv(
+    "EXTRACT_WORKERS", max(1, min(MAX_DEFAULT_WORKERS, available_cpus() // WEB_CONCURRENCY))
+))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", 120))
+# Split each PDF's pages across this many workers (1 = one worker per PDF)
+PAGE_WORKERS = int(os.getenv("PAGE_WORKERS", 1))
+
+_pool = None
+
+
+def _mp_context():
+    """
+    Start method for worker processes. The server is multithreaded (thread
+    pool, job heartbeat, sqlite connections), and forking it can leave a
+    child stuck on a lock some other thread held, so workers are forked
+    from a clean forkserver process instead, or spawned where there is none.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # The forkserver imports the main script once (the default), so the
+        # children it forks don't each run it again
+        context.set_forkserver_preload(["__main__", "workers"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def get_pool():
+    """Returns the shared extraction pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(1, EXTRACT_WORKERS), mp_context=_mp_context())
+    return _pool
+
+
+def warm_up():
+    """
+    Starts one worker process and has it import the PDF libraries in the
+    background, so the first upload doesn't wait for them and a cold start
+    can answer requests meanwhile. The pool starts further workers only as
+    uploads need them, so an idle server doesn't hold the libraries in
+    every worker.
+    """
+    get_pool().submit(extractor.warm_up)
+
+
+def reset_pool(pool=None, kill=False):
+    """
+    Discards a broken pool so the next call starts fresh workers.
+    Only resets if `pool` is still the current one, so concurrent failures
+    don't throw away a pool that was already replaced.
+
+    With `kill`, the pool's worker processes are killed first, to stop one
+    stuck on a PDF. Other files running or queued in that pool then fail
+    with BrokenProcessPool, and extract_pdf retries them on the new pool.
+    """
+    global _pool
+    if _pool is None or (pool is not None and pool is not _pool):
+        return
+    old, _pool = _pool, None
+    if kill:
+        for process in list((old._processes or {}).values()):
+            process.kill()
+        # Leave queued files to fail with BrokenProcessPool, not be cancelled
+        old.shutdown(wait=False)
+    else:
+        old.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def _extract_traced(pdf_path, profile_path=None):
+    """
+    Runs in a worker process: extracts a PDF and returns (data,
+    intermediates, spans), the last being the stage timings captured along
+    the way. With `profile_path`, the extraction also runs under cProfile
+    and the stats are written there.
+    """
+    profiler = cProfile.Profile() if profile_path else None
+    intermediates = {}
+    with metrics.capture() as spans:
+        if profiler:
+            profiler.enable()
+        try:
+            with metrics.span("extract"):
+                data = extractor.extract_data_from_pdf(pdf_path, intermediates=intermediates)
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(profile_path)
+    return data, intermediates, spans
+
+
+def _extract_parallel(pdf_path, pool, intermediates):
+    with metrics.span("extract"):
+        return extractor.extract_data_from_pdf_parallel(pdf_path, pool, PAGE_WORKERS, intermediates=intermediates)
+
+
+async def extract_pdf(pdf_path, timeout=None, profile_path=None, intermediates=None):
+    """
+    Runs extractor.extract_data_from_pdf in a worker process without blocking
+    the event loop. `pdf_path` may also be the PDF's bytes.
+
+    Raises asyncio.TimeoutError if the file takes longer than `timeout`
+    seconds; the pool is then replaced, killing the worker stuck on it. A worker
+    that crashes (e.g. segfaults inside a PDF library) breaks the pool; the
+    pool is then replaced and the file retried once.
+
+    Stage timings are recorded in metrics.registry. `profile_path` writes a
+    cProfile dump of the extraction there; the file is then extracted by a
+    single worker even when PAGE_WORKERS is set, so one profile covers it.
+    A dict passed as `intermediates` is filled as by extract_data_from_pdf.
+    """
+    if intermediates is None:
+        intermediates = {}
+    if timeout is None:
+        timeout = EXTRACT_TIMEOUT
+    loop = asyncio.get_running_loop()
+
+    for attempt in range(2):
+        pool = get_pool()
+        try:
+            if PAGE_WORKERS > 1 and not profile_path:
+                # Page ranges go to the pool; a thread waits on and merges them
+                future = loop.run_in_executor(None, _extract_parallel, pdf_path, pool, intermediates)
+                return await asyncio.wait_for(future, timeout)
+
+            future = loop.run_in_executor(pool, _extract_traced, pdf_path, profile_path)
+            data, collected, spans = await asyncio.wait_for(future, timeout)
+            metrics.record(spans)
+            intermediates.update(collected)
+            return data
+        except asyncio.TimeoutError:
+            logging.warning(f"Extraction of {extractor.describe_source(pdf_path)} timed out, restarting pool")
+            reset_pool(pool, kill=True)
+            raise
+        except BrokenProcessPool:
+            logging.warning(f"Extraction worker crashed on {extractor.describe_source(pdf_path)}, restarting pool")
+            reset_pool(pool)
+            if attempt:
+                raise
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import axios from 'axios'
 import { Download, CheckCircle, Database } from 'lucide-react'
 import { motion, AnimatePresence } from 'framer-motion'
@@ -6,23 +6,129 @@ import { Header } from './components/Header'
 import { UploadCard } from './components/UploadCard'
 import { ResultsTable } from './components/ResultsTable'
 
+// Columns shown in the history table; session details are left out so the
+// dashboard doesn't download every session's text
+const TABLE_FIELDS = [
+  "Course", "Semester", "Faculty Name(s)", "Contact", "School", "Credits",
+  "Pedagogy", "Teaching Pedagogy Enable/NP", "Schedule", "Prerequisite",
+  "Antirequisite", "Corequisite", "GER Category", "Course Description",
+  "Course Objectives", "Learning Outcomes", "Assessment/Evaluation",
+  "Attendance Policy", "Project / Assignment Details", "Course Material",
+  "Additional Information", "Source File"
+]
+
+// Columns of a session row, as in extractor.SESSION_FIELDS; the first is
+// the session number
+const SESSION_FIELDS = [
+  "Session", "TOPIC TITLE", "TOPIC & SUBTOPIC DETAILS", "READINGS, CASES, ETC.",
+  "ACTIVITIES", "IMPORTANT DATES"
+]
+
+// Polls of a background job, one a second, before the upload gives up
+const MAX_JOB_POLLS = 3600
+
+// Shows each session row as a "Session N" column, as the Excel export does
+const flattenSessions = (record) => {
+  const flat = {}
+  Object.entries(record).forEach(([key, value]) => {
+    if (key !== 'Sessions') {
+      flat[key] = value
+      return
+    }
+    value.forEach(session => {
+      flat[`Session ${session[0]}`] = SESSION_FIELDS.slice(1)
+        .map((field, i) => session[i + 1] ? `${field}: ${session[i + 1]}` : null)
+        .filter(Boolean)
+        .join('\n')
+    })
+  })
+  return flat
+}
+
+const SESSION_COLUMN = /^Session (\d+)$/
+
+// Gives every row the same columns in one order, as
+// main.fill_missing_fields does for /api/upload: the union of the rows'
+// keys as first seen, with the "Session N" columns kept together in number
+// order, since PDFs with more sessions add columns
+const alignColumns = (rows) => {
+  const keys = []
+  const seen = new Set()
+  const sessions = new Set()
+  rows.forEach(row => Object.keys(row).forEach(key => {
+    if (SESSION_COLUMN.test(key)) {
+      // null marks where the session columns go
+      if (sessions.size === 0) keys.push(null)
+      sessions.add(key)
+    } else if (!seen.has(key)) {
+      seen.add(key)
+      keys.push(key)
+    }
+  }))
+  const sessionKeys = [...sessions].sort(
+    (a, b) => a.match(SESSION_COLUMN)[1] - b.match(SESSION_COLUMN)[1]
+  )
+  const columns = keys.flatMap(key => key === null ? sessionKeys : [key])
+  return rows.map(row => Object.fromEntries(columns.map(key => [key, row[key] ?? ''])))
+}
+
 function App() {
   const [files, setFiles] = useState([])
   const [isUploading, setIsUploading] = useState(false)
   const [data, setData] = useState(null)
   const [allData, setAllData] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  // Also kept in refs: fetchNewData runs from the upload handler's closure,
+  // which would otherwise see the values from when the upload started
+  const nextCursorRef = useRef(null)
+  const lastSeq = useRef(0)
   const [downloadUrl, setDownloadUrl] = useState(null)
   const [error, setError] = useState(null)
 
-  const fetchAllData = async () => {
+  const updateNextCursor = (cursor) => {
+    nextCursorRef.current = cursor
+    setNextCursor(cursor)
+  }
+
+  const fetchAllData = async (cursor = null) => {
     try {
-      const response = await axios.get(`${import.meta.env.VITE_API_URL}/api/data`)
-      setAllData(response.data.data)
+      const response = await axios.get(`${import.meta.env.VITE_API_URL}/api/data`, {
+        params: { fields: TABLE_FIELDS.join(','), cursor: cursor || undefined }
+      })
+      setAllData(prev => cursor ? [...prev, ...response.data.data] : response.data.data)
+      updateNextCursor(response.data.next_cursor)
+      lastSeq.current = response.data.seq
     } catch (err) {
       console.error("Failed to fetch all data", err)
     }
   }
 
+  // Appends only the records stored since the last one loaded, instead of
+  // refetching the whole history
+  const fetchNewData = async () => {
+    // Unloaded pages come first; "Load more" reaches the new records
+    if (nextCursorRef.current) return
+    const since = lastSeq.current
+    try {
+      const response = await axios.get(`${import.meta.env.VITE_API_URL}/api/data/changes`, {
+        params: { fields: TABLE_FIELDS.join(','), since }
+      })
+      // A page loaded meanwhile may already have appended these records
+      if (lastSeq.current !== since) return
+      setAllData(prev => [...prev, ...response.data.data])
+      lastSeq.current = response.data.seq
+      if (response.data.has_more) {
+        updateNextCursor(String(response.data.seq))
+      }
+    } catch (err) {
+      if (err.response?.status === 410) {
+        fetchAllData()
+      } else {
+        console.error("Failed to fetch new data", err)
+      }
+    }
+  }
+
   useEffect(() => {
     fetchAllData()
   }, [])
@@ -33,6 +139,17 @@ function App() {
     }
   }
 
+  const pollJob = async (statusUrl) => {
+    for (let poll = 0; poll < MAX_JOB_POLLS; poll++) {
+      const response = await axios.get(`${import.meta.env.VITE_API_URL}${statusUrl}`)
+      if (['completed', 'failed'].includes(response.data.status)) {
+        return response.data
+      }
+      await new Promise(resolve => setTimeout(resolve, 1000))
+    }
+    throw new Error('Gave up waiting for the upload job to finish')
+  }
+
   const handleUpload = async () => {
     if (files.length === 0) return
 
@@ -47,15 +164,21 @@ function App() {
     })
 
     try {
-      const response = await axios.post(`${import.meta.env.VITE_API_URL}/api/upload`, formData, {
+      // Submit as a background job and poll until it finishes, so large
+      // batches don't hold the request open past proxy timeouts
+      const response = await axios.post(`${import.meta.env.VITE_API_URL}/api/jobs`, formData, {
         headers: {
           'Content-Type': 'multipart/form-data'
         }
       })
-      setData(response.data.data)
-      setDownloadUrl(response.data.download_url)
-      // Refresh all data list
-      fetchAllData()
+      const job = await pollJob(response.data.status_url)
+      if (job.status !== 'completed') {
+        throw new Error(job.error || 'Job failed')
+      }
+      setData(alignColumns(job.files.filter(f => f.data).map(f => flattenSessions(f.data))))
+      setDownloadUrl(job.download_url)
+      // Add the new records to the all data list
+      fetchNewData()
     } catch (err) {
       console.error(err)
       setError("Failed to process files. Please try again.")
@@ -106,9 +229,20 @@ function App() {
           <div className="pt-8 border-t border-slate-200">
             <ResultsTable
               data={allData}
+              columns={TABLE_FIELDS}
               title="All Uploaded Data"
               icon={Database}
             />
+            {nextCursor && (
+              <div className="flex justify-center pt-6">
+                <button
+                  onClick={() => fetchAllData(nextCursor)}
+                  className="bg-white hover:bg-slate-100 text-slate-700 px-5 py-2 rounded-lg font-medium border border-slate-300 shadow-sm transition-colors"
+                >
+                  Load more
+                </button>
+              </div>
+            )}
           </div>
         )}
 
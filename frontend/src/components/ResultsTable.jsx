@@ -1,8 +1,12 @@
 import React from 'react'
 
-export function ResultsTable({ data, title, icon: Icon, downloadUrl, onDownload }) {
+export function ResultsTable({ data, columns, title, icon: Icon, downloadUrl, onDownload }) {
     if (!data || data.length === 0) return null
 
+    // Cells are looked up by column, so rows with missing or reordered keys
+    // still line up under their headers
+    const headers = columns || Object.keys(data[0] || {})
+
     return (
         <div className="space-y-6">
             <div className="flex items-center justify-between px-4">
@@ -25,7 +29,7 @@ export function ResultsTable({ data, title, icon: Icon, downloadUrl, onDownload
                     <table className="w-full text-sm text-left border-collapse">
                         <thead className="bg-slate-50 text-slate-900 font-semibold sticky top-0 z-10">
                             <tr>
-                                {Object.keys(data[0] || {}).map((key) => (
+                                {headers.map((key) => (
                                     <th key={key} className="px-6 py-4 whitespace-nowrap uppercase tracking-wider text-xs border border-slate-300 bg-slate-100">{key}</th>
                                 ))}
                             </tr>
@@ -33,9 +37,9 @@ export function ResultsTable({ data, title, icon: Icon, downloadUrl, onDownload
                         <tbody>
                             {data.map((row, idx) => (
                                 <tr key={idx} className="hover:bg-slate-50 transition-colors">
-                                    {Object.values(row).map((val, i) => (
-                                        <td key={i} className="px-6 py-4 min-w-[250px] whitespace-pre-wrap align-top text-slate-700 border border-slate-300">
-                                            {val}
+                                    {headers.map((key) => (
+                                        <td key={key} className="px-6 py-4 min-w-[250px] whitespace-pre-wrap align-top text-slate-700 border border-slate-300">
+                                            {row[key] ?? ''}
                                         </td>
                                     ))}
                                 </tr>